@@ -0,0 +1,171 @@
+import argparse
+import atexit
+import base64
+import gzip
+import json
+import re
+import threading
+import time
+from collections import defaultdict, deque
+
+import requests
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# record/replay of the http exchanges made through the shared client
+#
+# a cassette is a gzipped json-lines file with one exchange per line (method,
+# path, content types, bodies, status and timing). recording wraps the real
+# transport, replaying answers from the cassette with no server at all.
+# exchanges are matched on method, path, accept and content type headers and
+# request body, in recorded order, so json and xml variants of a request each
+# get their own answer.
+#
+# selected with TODO_API_CASSETTE=PATH and TODO_API_CASSETTE_MODE=record|replay
+# or pytest --record PATH / --replay PATH. the recorded timings can be
+# summarized per route as a latency baseline:
+#
+#   python -m common.cassette summary todos.cassette
+
+
+def _encode(body):
+    if body is None:
+        return None
+    if isinstance(body, str):
+        return body
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        return {"base64": base64.b64encode(body).decode()}
+
+
+def _decode(body):
+    if body is None:
+        return b""
+    if isinstance(body, dict):
+        return base64.b64decode(body["base64"])
+    return body.encode("utf-8")
+
+
+def _key(method, path, accept, request_type, body):
+    return method, path, accept, request_type, _encode(body)
+
+
+class Recorder:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        atexit.register(self.close)
+
+    def write(self, exchange):
+        with self.lock:
+            if self.file is not None:
+                self.file.write(json.dumps(exchange, separators=(",", ":")) + "\n")
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+
+def load(path):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class RecordingAdapter(BaseAdapter):
+    # passes every request to the real adapter and records the exchange
+
+    def __init__(self, inner, recorder):
+        super().__init__()
+        self.inner = inner
+        self.recorder = recorder
+
+    def send(self, request, **kwargs):
+        start = time.perf_counter()
+        response = self.inner.send(request, **kwargs)
+        content = response.content
+        elapsed = time.perf_counter() - start
+        self.recorder.write({
+            "method": request.method,
+            "path": request.path_url,
+            "request_type": request.headers.get("Content-Type"),
+            "accept": request.headers.get("Accept"),
+            "request_body": _encode(request.body),
+            "status": response.status_code,
+            "response_type": response.headers.get("Content-Type"),
+            "response_body": _encode(content),
+            "elapsed_ms": round(elapsed * 1000, 3),
+        })
+        return response
+
+    def close(self):
+        self.inner.close()
+
+
+class ReplayAdapter(BaseAdapter):
+    # answers from a cassette, in recorded order for repeated requests
+
+    def __init__(self, exchanges):
+        super().__init__()
+        self.lock = threading.Lock()
+        self.exchanges = defaultdict(deque)
+        for exchange in exchanges:
+            key = (exchange["method"], exchange["path"], exchange.get("accept"), exchange.get("request_type"),
+                   exchange["request_body"])
+            self.exchanges[key].append(exchange)
+
+    def send(self, request, **kwargs):
+        key = _key(request.method, request.path_url, request.headers.get("Accept"),
+                   request.headers.get("Content-Type"), request.body)
+        with self.lock:
+            recorded = self.exchanges.get(key)
+            if not recorded:
+                raise requests.ConnectionError(
+                    f"no recorded response for {request.method} {request.path_url}", request=request
+                )
+            # the last exchange keeps answering once the recorded ones run out
+            exchange = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        response = Response()
+        response.status_code = exchange["status"]
+        response.headers = CaseInsensitiveDict(
+            {"Content-Type": exchange["response_type"]} if exchange["response_type"] else {}
+        )
+        response._content = _decode(exchange["response_body"])
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def route_of(path):
+    # /todos/12/categories?x=1 -> /todos/:id/categories
+    path = path.split("?")[0]
+    return "/".join(":id" if re.fullmatch(r"\d+", s) else s for s in path.split("/"))
+
+
+def summary(exchanges):
+    from common.histogram import Histogram
+    from common.stats import summarize
+
+    by_route = defaultdict(Histogram)
+    for exchange in exchanges:
+        by_route[f"{exchange['method']} {route_of(exchange['path'])}"].record(exchange["elapsed_ms"] / 1000)
+    return [dict(endpoint=route, **summarize(latencies)) for route, latencies in sorted(by_route.items())]
+
+
+if __name__ == "__main__":
+    from common.stats import print_table
+
+    parser = argparse.ArgumentParser(description="inspect a recorded cassette")
+    parser.add_argument("command", choices=["summary"])
+    parser.add_argument("path")
+    args = parser.parse_args()
+    print_table(summary(load(args.path)), ["endpoint", "count", "p50_ms", "p95_ms", "p99_ms", "max_ms"])
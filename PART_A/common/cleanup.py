@@ -0,0 +1,71 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client
+
+# registry of everything created through the shared client, torn down in bulk
+#
+# links are deleted first, then the entities, each phase concurrently over
+# the pooled connections. the conftest gives every test its own registry and
+# tears it down when the test ends, whether it passed or failed.
+
+
+class CleanupRegistry:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entities = []
+        self.links = []
+
+    def add(self, kind, entity_id):
+        with self.lock:
+            self.entities.append((kind, entity_id))
+
+    def add_link(self, kind, entity_id, relationship, target_id):
+        with self.lock:
+            self.links.append((kind, entity_id, relationship, target_id))
+
+    def __enter__(self):
+        client.add_listener(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        client.remove_listener(self)
+        self.teardown()
+
+    def teardown(self, workers=None):
+        # returns the deletes that failed, already deleted entities are fine
+        with self.lock:
+            links, self.links = self.links, []
+            entities, self.entities = self.entities, []
+        entities = list(dict.fromkeys(entities))
+        owned = set(entities)
+        # a link goes away with either of its entities
+        links = [
+            link for link in dict.fromkeys(links)
+            if (link[0], link[1]) not in owned
+            and (client.CREATED_KINDS[link[2]], link[3]) not in owned
+        ]
+        paths = [
+            [f"/{kind}/{i}/{relationship}/{target}" for kind, i, relationship, target in links],
+            [f"/{kind}/{i}" for kind, i in entities],
+        ]
+        failures = []
+        workers = workers or client.POOL_SIZE
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for phase in paths:
+                for path, error in zip(phase, pool.map(_delete, phase)):
+                    if error:
+                        failures.append((path, error))
+        return failures
+
+
+def _delete(path):
+    try:
+        response = client.delete(path)
+    except requests.RequestException as e:
+        return str(e)
+    if response.status_code not in (200, 204, 404):
+        return f"status {response.status_code}"
+    return None
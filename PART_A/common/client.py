@@ -0,0 +1,247 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.histogram import Histogram
+
+# shared http client for the todos and projects suites
+#
+# every call goes through one requests.Session with a keep-alive connection
+# pool, so a full run reuses a handful of sockets instead of opening (and
+# leaving in TIME_WAIT) a new tcp connection per request
+
+API_URL = os.environ.get("TODO_API_URL", "http://localhost:4567").rstrip("/")
+POOL_SIZE = int(os.environ.get("TODO_API_POOL_SIZE", "4"))
+TIMEOUT = float(os.environ.get("TODO_API_TIMEOUT", "10"))
+
+# "http" talks to the jar, "fake" answers from the in-memory stand-in in
+# common/fake_server.py without touching the network
+BACKEND = os.environ.get("TODO_API_BACKEND", "http")
+
+# record every exchange to, or replay them from, the cassette file in
+# common/cassette.py (mode "record" or "replay")
+CASSETTE = os.environ.get("TODO_API_CASSETTE", "")
+CASSETTE_MODE = os.environ.get("TODO_API_CASSETTE_MODE", "")
+
+# set per worker by the parallel runner, when it is set global listings and
+# cleanup only see the entities created through this client
+NAMESPACE = os.environ.get("TODO_API_NAMESPACE", "")
+
+# collection a POST creates into, by the last segment of its path
+CREATED_KINDS = {
+    "todos": "todos",
+    "projects": "projects",
+    "categories": "categories",
+    "tasks": "todos",
+    "tasksof": "projects",
+}
+
+# latency of every request made through the client in this process
+LATENCY = Histogram()
+
+_session = None
+# the first requests of a thread pool all find no session yet
+_session_lock = threading.RLock()
+_fake_adapter = None
+_recorder = None
+_replay_adapter = None
+_created = {"todos": set(), "projects": set(), "categories": set()}
+# objects with add(kind, id) and add_link(kind, id, relationship, target_id)
+# that are told about everything created through the client
+_listeners = []
+# threads inside unrecorded() do not tell the listeners
+_local = threading.local()
+
+
+def _build_session():
+    session = requests.Session()
+    # requests reads the proxy and ca bundle settings from os.environ on every
+    # call, which costs more than a whole request to a local server. read them
+    # once per session instead
+    session.proxies.update(requests.utils.get_environ_proxies(API_URL))
+    session.verify = os.environ.get("REQUESTS_CA_BUNDLE") or os.environ.get("CURL_CA_BUNDLE") or True
+    session.trust_env = False
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    if BACKEND == "fake":
+        session.mount(API_URL, get_fake_adapter())
+    if CASSETTE and CASSETTE_MODE == "record":
+        from common.cassette import RecordingAdapter
+
+        session.mount(API_URL, RecordingAdapter(session.get_adapter(API_URL), _get_recorder()))
+    elif CASSETTE and CASSETTE_MODE == "replay":
+        session.mount(API_URL, _get_replay_adapter())
+    return session
+
+
+def _get_recorder():
+    global _recorder
+    if _recorder is None:
+        from common.cassette import Recorder
+
+        _recorder = Recorder(CASSETTE)
+    return _recorder
+
+
+def _get_replay_adapter():
+    global _replay_adapter
+    if _replay_adapter is None:
+        from common.cassette import ReplayAdapter, load
+
+        _replay_adapter = ReplayAdapter(load(CASSETTE))
+    return _replay_adapter
+
+
+def close_cassette():
+    # finishes the cassette being recorded
+    global _recorder, _replay_adapter
+    if _recorder is not None:
+        _recorder.close()
+    _recorder = None
+    _replay_adapter = None
+
+
+def get_fake_adapter():
+    # the fake keeps its data for the whole process, across session rebuilds
+    global _fake_adapter
+    with _session_lock:
+        if _fake_adapter is None:
+            from common.fake_server import FakeAdapter
+
+            _fake_adapter = FakeAdapter()
+    return _fake_adapter
+
+
+def get_session():
+    global _session
+    session = _session
+    if session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+            session = _session
+    return session
+
+
+def configure(base_url=None, pool_size=None, timeout=None, backend=None, cassette=None, cassette_mode=None):
+    # change the client settings, the pool is rebuilt on the next request
+    global API_URL, POOL_SIZE, TIMEOUT, BACKEND, CASSETTE, CASSETTE_MODE
+    if base_url is not None:
+        API_URL = base_url.rstrip("/")
+    if pool_size is not None:
+        POOL_SIZE = pool_size
+    if timeout is not None:
+        TIMEOUT = timeout
+    if backend is not None:
+        BACKEND = backend
+    if cassette is not None or cassette_mode is not None:
+        close_cassette()
+        CASSETTE = cassette if cassette is not None else CASSETTE
+        CASSETTE_MODE = cassette_mode if cassette_mode is not None else CASSETTE_MODE
+    close()
+
+
+def close():
+    global _session
+    if _session is not None:
+        _session.close()
+        _session = None
+
+
+def request(method, url, **kwargs):
+    # relative paths are resolved against the configured base url
+    if url.startswith("/"):
+        url = API_URL + url
+    kwargs.setdefault("timeout", TIMEOUT)
+    start = time.perf_counter()
+    response = get_session().request(method, url, **kwargs)
+    LATENCY.record(time.perf_counter() - start)
+    if method.upper() == "POST" and response.status_code == 201:
+        _record_created(url, kwargs.get("json"), response)
+    return response
+
+
+def _record_created(url, body, response):
+    segments = urlsplit(url).path.strip("/").split("/")
+    kind = CREATED_KINDS.get(segments[-1])
+    if kind is None:
+        return
+    listeners = [] if getattr(_local, "unrecorded", False) else list(_listeners)
+    if len(segments) == 3 and isinstance(body, dict) and "id" in body:
+        # linked an existing entity instead of creating one
+        for listener in listeners:
+            listener.add_link(segments[0], segments[1], segments[2], str(body["id"]))
+        return
+    try:
+        entity_id = response.json().get("id")
+    except ValueError:
+        return
+    if entity_id is not None:
+        _created[kind].add(str(entity_id))
+        for listener in listeners:
+            listener.add(kind, str(entity_id))
+
+
+def add_listener(listener):
+    _listeners.append(listener)
+
+
+def remove_listener(listener):
+    _listeners.remove(listener)
+
+
+@contextmanager
+def unrecorded():
+    # entities created in this block (on this thread) are owned by the caller,
+    # the listeners (e.g. a test's cleanup registry) do not delete them
+    previous = getattr(_local, "unrecorded", False)
+    _local.unrecorded = True
+    try:
+        yield
+    finally:
+        _local.unrecorded = previous
+
+
+def created_ids(kind):
+    return set(_created[kind])
+
+
+def in_namespace(kind, entity_id):
+    # without a namespace every entity on the server belongs to this run
+    return not NAMESPACE or str(entity_id) in _created[kind]
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def head(url, **kwargs):
+    # same default as requests.head
+    kwargs.setdefault("allow_redirects", False)
+    return request("HEAD", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def put(url, **kwargs):
+    return request("PUT", url, **kwargs)
+
+
+def patch(url, **kwargs):
+    return request("PATCH", url, **kwargs)
+
+
+def delete(url, **kwargs):
+    return request("DELETE", url, **kwargs)
+
+
+def options(url, **kwargs):
+    return request("OPTIONS", url, **kwargs)
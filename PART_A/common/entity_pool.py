@@ -0,0 +1,162 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client
+from common.state import RELATED, _fields
+
+# pool of pre-created todos, projects and categories for the suites
+#
+# most tests start by creating an entity with some title and description and
+# end by deleting it. the pool creates those entities up front instead, all
+# kinds at once from a thread pool, and hands them out by kind and fields:
+#   - borrow() gives every read-only test the same entity, it is never changed
+#   - take() gives a test an entity of its own. once the test is over it is
+#     recycled in the background when no fresh one is left for the next
+#     take(): its links are removed and its fields put back, or it is dropped
+#     when the test deleted it
+# a take() the pool has nothing for creates a small batch. everything the pool
+# created is deleted concurrently when it is closed. pool requests are kept
+# out of the tests' cleanup registries.
+
+
+class EntityPool:
+    def __init__(self, batch=2, workers=2):
+        self.batch = batch
+        self.condition = threading.Condition()
+        self.ready = {}  # key -> ids free to take
+        self.shared = {}  # key -> id handed to every borrow()
+        self.recycling = {}  # key -> ids being recycled
+        self.owned = {}  # (kind, id) -> the entity as created
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+
+    @staticmethod
+    def _key(kind, fields):
+        return kind, tuple(sorted(fields.items()))
+
+    def _create(self, kind, fields):
+        with client.unrecorded():
+            response = client.post(f"/{kind}", json=fields)
+        assert response.status_code == 201, f"pool could not create {kind} {fields}"
+        entity = response.json()
+        entity_id = str(entity["id"])
+        with self.condition:
+            self.owned[(kind, entity_id)] = entity
+        return entity_id
+
+    def prefill(self, plan):
+        # create every entity of plan [(kind, count, fields), ...] concurrently,
+        # ready to be borrowed or taken
+        jobs = [(kind, fields) for kind, count, fields in plan for _ in range(count)]
+        with ThreadPoolExecutor(max_workers=client.POOL_SIZE) as pool:
+            ids = list(pool.map(lambda job: self._create(*job), jobs))
+        with self.condition:
+            for (kind, fields), entity_id in zip(jobs, ids):
+                self.ready.setdefault(self._key(kind, fields), []).append(entity_id)
+            self.condition.notify_all()
+
+    def fill(self, kind, count, **fields):
+        self.prefill([(kind, count, fields)])
+
+    def borrow(self, kind, **fields):
+        # an entity for a test that only reads it
+        key = self._key(kind, fields)
+        with self.condition:
+            if key in self.shared:
+                return self.shared[key]
+            ready = self.ready.get(key)
+            entity_id = ready.pop() if ready else None
+        if entity_id is None:
+            entity_id = self._create(kind, fields)
+        with self.condition:
+            return self.shared.setdefault(key, entity_id)
+
+    def take(self, kind, **fields):
+        # an entity for a test that changes or deletes it, give it back with release()
+        key = self._key(kind, fields)
+        with self.condition:
+            # a recycled entity is cheaper than a new one, wait for it
+            while not self.ready.get(key) and self.recycling.get(key):
+                self.condition.wait()
+            if self.ready.get(key):
+                return self.ready[key].pop()
+        self.fill(kind, self.batch, **fields)
+        return self.take(kind, **fields)
+
+    def release(self, kind, entity_id, **fields):
+        key = self._key(kind, fields)
+        with self.condition:
+            # recycling costs about as many requests as a new entity, only do
+            # it when there is no fresh one left. the used one is deleted at close
+            if self.ready.get(key):
+                return
+            self.recycling.setdefault(key, set()).add(entity_id)
+        self.executor.submit(self._recycle, key, kind, entity_id)
+
+    def _recycle(self, key, kind, entity_id):
+        clean = False
+        try:
+            with client.unrecorded():
+                clean = self._reset(kind, entity_id)
+        except requests.RequestException:
+            pass
+        with self.condition:
+            self.recycling[key].discard(entity_id)
+            if clean:
+                self.ready.setdefault(key, []).append(entity_id)
+            self.condition.notify_all()
+
+    def _reset(self, kind, entity_id):
+        # put the entity back the way it was created, False when it is gone
+        response = client.get(f"/{kind}/{entity_id}")
+        if response.status_code != 200:
+            with self.condition:
+                self.owned.pop((kind, entity_id), None)
+            return False
+        entity = response.json()[kind][0]
+        for relationship, related in entity.items():
+            if (kind, relationship) in RELATED:
+                for target in related:
+                    client.delete(f"/{kind}/{entity_id}/{relationship}/{target['id']}")
+        created = self.owned[(kind, entity_id)]
+        if _fields(entity) != _fields(created):
+            client.put(f"/{kind}/{entity_id}", json=_fields(created))
+        return True
+
+    def close(self):
+        # wait for the recycling, then delete everything the pool created
+        self.executor.shutdown(wait=True)
+        with self.condition:
+            owned, self.owned = list(self.owned), {}
+            self.ready, self.shared = {}, {}
+        with ThreadPoolExecutor(max_workers=client.POOL_SIZE) as pool:
+            list(pool.map(lambda item: _delete(*item), owned))
+
+
+class Lease:
+    # the entities one test took from the pool, released when it ends
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.taken = []
+
+    def borrow(self, kind, **fields):
+        return self.pool.borrow(kind, **fields)
+
+    def take(self, kind, **fields):
+        entity_id = self.pool.take(kind, **fields)
+        self.taken.append((kind, entity_id, fields))
+        return entity_id
+
+    def release(self):
+        for kind, entity_id, fields in self.taken:
+            self.pool.release(kind, entity_id, **fields)
+        self.taken = []
+
+
+def _delete(kind, entity_id):
+    try:
+        client.delete(f"/{kind}/{entity_id}")
+    except requests.RequestException:
+        pass
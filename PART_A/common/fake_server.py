@@ -0,0 +1,424 @@
+import argparse
+import json
+import threading
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+from xml.sax.saxutils import escape
+
+from requests import Response
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+# in-memory stand-in for runTodoManagerRestAPI-1.5.5.jar
+#
+# implements /todos, /projects, /categories and their relationship routes with
+# json and xml bodies, answering with the status codes recorded in the
+# Session_Notes.txt files (including the observed bugs, e.g. relationship
+# listings of a missing parent returning 200). it is mounted on the shared
+# client with TODO_API_BACKEND=fake or pytest --backend fake, and can also be
+# served over http:
+#
+#   python -m common.fake_server --port 4567
+
+# default value of every field of an entity
+FIELDS = {
+    "todos": {"title": "", "doneStatus": False, "description": ""},
+    "projects": {"title": "", "completed": False, "active": False, "description": ""},
+    "categories": {"title": "", "description": ""},
+}
+MANDATORY = {"todos": ["title"], "projects": [], "categories": ["title"]}
+SINGULAR = {"todos": "todo", "projects": "project", "categories": "category"}
+
+# (kind, relationship) -> kind of the related entities
+RELATIONSHIPS = {
+    ("todos", "categories"): "categories",
+    ("todos", "tasksof"): "projects",
+    ("projects", "tasks"): "todos",
+    ("projects", "categories"): "categories",
+    ("categories", "todos"): "todos",
+    ("categories", "projects"): "projects",
+}
+# relationships that are kept in sync on both sides
+REVERSE = {
+    ("todos", "tasksof"): ("projects", "tasks"),
+    ("projects", "tasks"): ("todos", "tasksof"),
+}
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _initial_data():
+    # the data the jar starts with
+    return {
+        "todos": {
+            "1": {"title": "scan paperwork", "doneStatus": False, "description": "",
+                  "categories": ["1"], "tasksof": ["1"]},
+            "2": {"title": "file paperwork", "doneStatus": False, "description": "",
+                  "tasksof": ["1"]},
+        },
+        "projects": {
+            "1": {"title": "Office Work", "completed": False, "active": False,
+                  "description": "", "tasks": ["1", "2"]},
+        },
+        "categories": {
+            "1": {"title": "Office", "description": ""},
+            "2": {"title": "Home", "description": ""},
+        },
+    }
+
+
+def _format_value(value):
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def _parse_xml(body):
+    # the root element only names the entity, its children are the fields
+    try:
+        root = ET.fromstring(body)
+    except ET.ParseError as e:
+        raise BadRequest(f"Invalid XML: {e}")
+    data = {}
+    for child in root:
+        text = (child.text or "").strip()
+        # like the jar, numeric text is read as a number
+        data[child.tag] = int(text) if text.isdigit() else text
+    return data
+
+
+class TodoManager:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.data = _initial_data()
+            self.next_id = {
+                kind: max(int(i) for i in entities) + 1 for kind, entities in self.data.items()
+            }
+
+    #### RENDERING ####
+
+    def render(self, kind, entity_id):
+        entity = self.data[kind][entity_id]
+        rendered = {"id": entity_id}
+        for field in FIELDS[kind]:
+            rendered[field] = _format_value(entity[field])
+        for (source, relationship) in RELATIONSHIPS:
+            if source == kind and entity.get(relationship):
+                rendered[relationship] = [{"id": i} for i in entity[relationship]]
+        return rendered
+
+    def _xml(self, kind, rendered):
+        parts = [f"<{SINGULAR[kind]}>"]
+        for key, value in rendered.items():
+            if isinstance(value, list):
+                parts += [f"<{key}><id>{escape(v['id'])}</id></{key}>" for v in value]
+            else:
+                parts.append(f"<{key}>{escape(value)}</{key}>")
+        parts.append(f"</{SINGULAR[kind]}>")
+        return "".join(parts)
+
+    def _body(self, payload, kind, accept_xml):
+        # payload is either a rendered entity or {collection: [entities]}
+        if not accept_xml:
+            return "application/json", json.dumps(payload).encode()
+        if "errorMessages" in payload:
+            messages = "".join(f"<errorMessage>{escape(m)}</errorMessage>" for m in payload["errorMessages"])
+            return "application/xml", f"<errorMessages>{messages}</errorMessages>".encode()
+        if kind in payload and isinstance(payload[kind], list):
+            items = "".join(self._xml(kind, item) for item in payload[kind])
+            return "application/xml", f"<{kind}>{items}</{kind}>".encode()
+        return "application/xml", self._xml(kind, payload).encode()
+
+    #### VALIDATION ####
+
+    def _validate(self, kind, body, creating):
+        if "id" in body:
+            if creating:
+                raise BadRequest("Invalid Creation: Failed Validation: Not allowed to create with id")
+            raise BadRequest("Failed Validation: id should be ID")
+        for field, value in body.items():
+            if field not in FIELDS[kind]:
+                raise BadRequest(f"Could not find field: {field}")
+            default = FIELDS[kind][field]
+            if isinstance(default, bool):
+                if not isinstance(value, bool) and str(value).lower() not in ("true", "false"):
+                    raise BadRequest(f"Failed Validation: {field} should be BOOLEAN")
+            elif not isinstance(value, (str, int, float)) or isinstance(value, bool):
+                raise BadRequest(f"Failed Validation: {field} should be STRING")
+
+    def _apply(self, kind, entity, body):
+        for field, value in body.items():
+            if isinstance(FIELDS[kind][field], bool):
+                value = value if isinstance(value, bool) else str(value).lower() == "true"
+            else:
+                value = str(value)
+            entity[field] = value
+
+    def _check_mandatory(self, kind, entity):
+        for field in MANDATORY[kind]:
+            if entity[field] == "":
+                raise BadRequest(f"{field} : field is mandatory")
+
+    def create(self, kind, body):
+        self._validate(kind, body, creating=True)
+        entity = dict(FIELDS[kind])
+        self._apply(kind, entity, body)
+        self._check_mandatory(kind, entity)
+        entity_id = str(self.next_id[kind])
+        self.next_id[kind] += 1
+        self.data[kind][entity_id] = entity
+        return entity_id
+
+    #### RELATIONSHIPS ####
+
+    def link(self, kind, entity_id, relationship, target_id):
+        links = self.data[kind][entity_id].setdefault(relationship, [])
+        if target_id not in links:
+            links.append(target_id)
+        reverse = REVERSE.get((kind, relationship))
+        if reverse:
+            target_kind, target_relationship = reverse
+            back = self.data[target_kind][target_id].setdefault(target_relationship, [])
+            if entity_id not in back:
+                back.append(entity_id)
+
+    def unlink(self, kind, entity_id, relationship, target_id):
+        self.data[kind][entity_id][relationship].remove(target_id)
+        reverse = REVERSE.get((kind, relationship))
+        if reverse:
+            target_kind, target_relationship = reverse
+            back = self.data[target_kind].get(target_id, {}).get(target_relationship, [])
+            if entity_id in back:
+                back.remove(entity_id)
+
+    def delete(self, kind, entity_id):
+        del self.data[kind][entity_id]
+        for (source, relationship), target in RELATIONSHIPS.items():
+            if target != kind:
+                continue
+            for entity in self.data[source].values():
+                links = entity.get(relationship, [])
+                if entity_id in links:
+                    links.remove(entity_id)
+
+    #### REQUEST HANDLING ####
+
+    def handle(self, method, url, headers, body):
+        # returns (status, headers, body bytes)
+        headers = CaseInsensitiveDict(headers or {})
+        if isinstance(body, str):
+            body = body.encode()
+        accept_xml = "xml" in headers.get("Accept", "") and "json" not in headers.get("Accept", "")
+        parts = urlsplit(url)
+        segments = [s for s in parts.path.split("/") if s]
+        query = dict(parse_qsl(parts.query))
+        with self.lock:
+            try:
+                status, kind, payload = self._route(method.upper(), segments, query, headers, body)
+            except BadRequest as e:
+                status, kind, payload = 400, None, {"errorMessages": [str(e)]}
+            except Exception as e:
+                # like any server, a bug in a handler is a 500 rather than a crash
+                status, kind, payload = 500, None, {"errorMessages": [f"{type(e).__name__}: {e}"]}
+        if payload is None:
+            return status, {"Content-Type": "application/json"}, b""
+        if isinstance(payload, bytes):
+            return status, {"Content-Type": "text/html"}, payload
+        content_type, data = self._body(payload, kind, accept_xml)
+        return status, {"Content-Type": content_type}, data
+
+    def _read_body(self, headers, body):
+        if not body or not body.strip():
+            return {}, False
+        if "xml" in headers.get("Content-Type", ""):
+            return _parse_xml(body), True
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            raise BadRequest(f"Invalid JSON: {e}")
+        if not isinstance(data, dict):
+            raise BadRequest("Invalid JSON: expected an object")
+        return data, False
+
+    def _not_found(self, path):
+        return 404, None, {"errorMessages": [f"Could not find any instances with {path}"]}
+
+    def _route(self, method, segments, query, headers, body):
+        if method == "OPTIONS":
+            return 200, None, None
+        if not segments:
+            if method in ("GET", "HEAD"):
+                return 200, None, b"<html><body>Todo Manager fake</body></html>"
+            return 405, None, None
+        if segments == ["shutdown"]:
+            # the jar exits here, the fake starts over with its initial data
+            self.reset()
+            return 200, None, None
+
+        kind = segments[0]
+        if kind not in self.data or len(segments) > 4:
+            return 404, None, None
+        path = "/".join(segments)
+
+        if len(segments) == 1:
+            if method in ("GET", "HEAD"):
+                rendered = (self.render(kind, i) for i in self.data[kind])
+                items = [item for item in rendered if all(item.get(k) == v for k, v in query.items())]
+                return 200, kind, {kind: items}
+            if method == "POST":
+                data, _ = self._read_body(headers, body)
+                return 201, kind, self.render(kind, self.create(kind, data))
+            return 405, None, None
+
+        entity_id = segments[1]
+        exists = entity_id in self.data[kind]
+
+        if len(segments) == 2:
+            if method not in ("GET", "HEAD", "POST", "PUT", "DELETE"):
+                return 405, None, None
+            if not exists:
+                return self._not_found(path)
+            entity = self.data[kind][entity_id]
+            if method in ("GET", "HEAD"):
+                return 200, kind, {kind: [self.render(kind, entity_id)]}
+            if method == "DELETE":
+                self.delete(kind, entity_id)
+                return 200, None, None
+            data, _ = self._read_body(headers, body)
+            self._validate(kind, data, creating=False)
+            updated = dict(entity)
+            if method == "PUT":
+                updated.update(FIELDS[kind])
+            self._apply(kind, updated, data)
+            self._check_mandatory(kind, updated)
+            self.data[kind][entity_id] = updated
+            return 200, kind, self.render(kind, entity_id)
+
+        relationship = segments[2]
+        target = RELATIONSHIPS.get((kind, relationship))
+        if target is None:
+            return 404, None, None
+
+        if len(segments) == 3:
+            if method in ("GET", "HEAD"):
+                if exists:
+                    parents = [entity_id]
+                else:
+                    # observed bug: a missing parent lists the related
+                    # entities of every instance instead of returning 404
+                    parents = list(self.data[kind])
+                ids = []
+                for parent in parents:
+                    ids += [i for i in self.data[kind][parent].get(relationship, []) if i not in ids]
+                return 200, target, {target: [self.render(target, i) for i in ids]}
+            if method != "POST":
+                return 405, None, None
+            if not exists:
+                return 404, None, {"errorMessages": [f"Could not find parent thing for relationship {path}"]}
+            data, from_xml = self._read_body(headers, body)
+            if "id" in data:
+                target_id = data["id"]
+                if from_xml:
+                    raise BadRequest("Failed Validation: id should be ID")
+                if not isinstance(target_id, str) or target_id not in self.data[target]:
+                    return 404, None, {"errorMessages": ["Could not find thing matching value for id"]}
+                self.link(kind, entity_id, relationship, target_id)
+                return 201, None, None
+            target_id = self.create(target, data)
+            self.link(kind, entity_id, relationship, target_id)
+            return 201, target, self.render(target, target_id)
+
+        if method != "DELETE":
+            return 405, None, None
+        target_id = segments[3]
+        if not exists or target_id not in self.data[kind][entity_id].get(relationship, []):
+            return self._not_found(path)
+        self.unlink(kind, entity_id, relationship, target_id)
+        return 200, None, None
+
+
+class FakeAdapter(BaseAdapter):
+    # requests transport adapter that answers from a TodoManager in memory
+
+    def __init__(self, server=None):
+        super().__init__()
+        self.server = server or TodoManager()
+
+    def send(self, request, **kwargs):
+        status, headers, body = self.server.handle(
+            request.method, request.path_url, request.headers, request.body
+        )
+        response = Response()
+        response.status_code = status
+        response.reason = REASONS.get(status, "")
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = b"" if request.method == "HEAD" else body
+        response.encoding = "utf-8"
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        return response
+
+    def close(self):
+        pass
+
+
+def make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # headers and body go out as separate writes, without this every
+        # keep-alive response waits out the peer's delayed ack
+        disable_nagle_algorithm = True
+
+        def _handle(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = self.rfile.read(length) if length else b""
+            status, headers, data = server.handle(self.command, self.path, dict(self.headers), body)
+            self.send_response(status)
+            for key, value in headers.items():
+                self.send_header(key, value)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            if self.command != "HEAD":
+                self.wfile.write(data)
+
+        do_GET = do_HEAD = do_POST = do_PUT = do_PATCH = do_DELETE = do_OPTIONS = _handle
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(port=4567, host="localhost", server=None):
+    httpd = ThreadingHTTPServer((host, port), make_handler(server or TodoManager()))
+    httpd.daemon_threads = True
+    return httpd
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="serve the in-memory todo manager over http")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=4567)
+    args = parser.parse_args()
+    httpd = serve(args.port, args.host)
+    print(f"fake todo manager listening on http://{args.host}:{args.port}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
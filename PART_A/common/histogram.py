@@ -0,0 +1,141 @@
+import base64
+import sys
+import threading
+import zlib
+from array import array
+
+# log-bucketed latency histogram (in the style of HdrHistogram)
+#
+# values are counted in microsecond buckets whose width grows with the value,
+# so every recorded latency is kept to within 1% using a fixed array of a few
+# thousand counters, however many requests a run makes. histograms with the
+# same layout can be merged (e.g. from worker processes) and serialized to a
+# compact dict for json reports.
+
+SUB_BUCKET_BITS = 8  # 256 sub-buckets, two significant figures
+HIGHEST_US = 3600 * 1000 * 1000  # an hour, longer values are clamped
+
+
+def _index(value):
+    # buckets double in width every 128 slots past the first 256 values
+    shift = max(0, value.bit_length() - SUB_BUCKET_BITS)
+    return (shift << (SUB_BUCKET_BITS - 1)) + (value >> shift)
+
+
+def _highest_in_bucket(index):
+    shift = max(0, (index >> (SUB_BUCKET_BITS - 1)) - 1)
+    lowest = (index - (shift << (SUB_BUCKET_BITS - 1))) << shift
+    return lowest + (1 << shift) - 1
+
+
+class Histogram:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = array("q", [0]) * (_index(HIGHEST_US) + 1)
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+
+    @classmethod
+    def of(cls, latencies):
+        histogram = cls()
+        for seconds in latencies:
+            histogram.record(seconds)
+        return histogram
+
+    def record(self, seconds):
+        self.record_us(int(round(seconds * 1000000)))
+
+    def record_us(self, value):
+        value = min(max(0, value), HIGHEST_US)
+        with self.lock:
+            self.counts[_index(value)] += 1
+            self.min_us = value if not self.count else min(self.min_us, value)
+            self.max_us = max(self.max_us, value)
+            self.count += 1
+            self.total_us += value
+
+    def merge(self, other):
+        with self.lock:
+            for i, n in enumerate(other.counts):
+                if n:
+                    self.counts[i] += n
+            if other.count:
+                self.min_us = other.min_us if not self.count else min(self.min_us, other.min_us)
+                self.max_us = max(self.max_us, other.max_us)
+            self.count += other.count
+            self.total_us += other.total_us
+        return self
+
+    def copy(self):
+        histogram = Histogram()
+        with self.lock:
+            histogram.counts = array("q", self.counts)
+            histogram.count = self.count
+            histogram.total_us = self.total_us
+            histogram.min_us = self.min_us
+            histogram.max_us = self.max_us
+        return histogram
+
+    def since(self, earlier):
+        # the values recorded after the copy earlier was taken; min and max
+        # are those of the whole histogram
+        histogram = self.copy()
+        for i, n in enumerate(earlier.counts):
+            if n:
+                histogram.counts[i] -= n
+        histogram.count -= earlier.count
+        histogram.total_us -= earlier.total_us
+        return histogram
+
+    def percentile(self, p):
+        # nearest-rank percentile in seconds, the top of its bucket
+        if not self.count:
+            return 0.0
+        rank = max(1, -(-self.count * p // 100))
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return min(_highest_in_bucket(i), self.max_us) / 1000000
+        return self.max_us / 1000000
+
+    def mean(self):
+        return self.total_us / self.count / 1000000 if self.count else 0.0
+
+    def total(self):
+        return self.total_us / 1000000
+
+    def maximum(self):
+        return self.max_us / 1000000
+
+    def to_dict(self):
+        counts = array("q", self.counts)
+        if sys.byteorder == "big":
+            counts.byteswap()
+        return {
+            "unit": "us",
+            "sub_bucket_bits": SUB_BUCKET_BITS,
+            "count": self.count,
+            "total_us": self.total_us,
+            "min_us": self.min_us,
+            "max_us": self.max_us,
+            "counts": base64.b64encode(zlib.compress(counts.tobytes())).decode(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        if data.get("sub_bucket_bits") != SUB_BUCKET_BITS:
+            raise ValueError("histogram was recorded with a different bucket layout")
+        histogram = cls()
+        counts = array("q")
+        counts.frombytes(zlib.decompress(base64.b64decode(data["counts"])))
+        if sys.byteorder == "big":
+            counts.byteswap()
+        histogram.counts = counts
+        histogram.count = data["count"]
+        histogram.total_us = data["total_us"]
+        histogram.min_us = data["min_us"]
+        histogram.max_us = data["max_us"]
+        return histogram
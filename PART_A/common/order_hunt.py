@@ -0,0 +1,195 @@
+import argparse
+import json
+import os
+import queue
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import client, server
+from common.stats import print_table, write_json
+
+# order-dependence hunter for the random_order suites (random_test.py)
+#
+# runs the suite under many seeds at once, one todo manager per worker, and
+# records the seed of every run with a failure. a test that fails in a
+# shuffled order but passes on its own depends on something an earlier test
+# did, so the tests that ran before it are cut down (delta debugging) to the
+# smallest sequence that still makes it fail.
+#
+# usage (from PART_A): python -m common.order_hunt todos/tests/random_test.py --seeds 50 -n 4
+#
+# against the jar every run gets a freshly started server so a seed always
+# starts from the same data; the fake backend is fresh in every pytest process.
+
+PART_A = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class Worker:
+    # a server of its own and the environment to run pytest against it
+
+    def __init__(self, index, backend):
+        self.index = index
+        self.backend = backend
+        self.server = None
+
+    def env(self):
+        env = dict(os.environ, TODO_API_BACKEND=self.backend)
+        if self.backend != "fake":
+            # the data left by the previous run would change the outcome
+            if self.server is not None:
+                self.server.stop()
+            self.server = server.TodoManagerServer().start()
+            env["TODO_API_URL"] = self.server.url
+        return env
+
+    def stop(self):
+        if self.server is not None:
+            self.server.stop()
+            self.server = None
+
+
+def run_pytest(worker, args):
+    # returns (node ids in the order they ran, failed node ids, seed)
+    fd, results_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider", "--summary-json", results_path, *args],
+            cwd=PART_A,
+            env=worker.env(),
+            capture_output=True,
+            text=True,
+        )
+        with open(results_path) as f:
+            text = f.read()
+    finally:
+        os.remove(results_path)
+    if not text:
+        raise RuntimeError(f"pytest produced no results for {' '.join(args)}")
+    results = json.loads(text)
+    failed = {node for node, result in zip(results["order"], results["results"]) if result[0] == "FAILED"}
+    return results["order"], failed, results["seed"]
+
+
+def fails_after(worker, sequence, target):
+    order, failed, _ = run_pytest(worker, ["--keep-order", *sequence, target])
+    return target in failed
+
+
+def minimize(worker, prefix, target):
+    # drop chunks of the earlier tests while the target keeps failing,
+    # halving the chunk size down to single tests. returns None for the
+    # sequence when the failing order does not fail again (flaky)
+    runs = 1
+    if not fails_after(worker, prefix, target):
+        return None, runs
+    chunk = max(1, len(prefix) // 2)
+    while True:
+        i = 0
+        while i < len(prefix):
+            candidate = prefix[:i] + prefix[i + chunk:]
+            runs += 1
+            if fails_after(worker, candidate, target):
+                prefix = candidate
+            else:
+                i += chunk
+        if chunk == 1:
+            return prefix, runs
+        chunk = max(1, chunk // 2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="find tests that fail only in some orders")
+    parser.add_argument("path", nargs="?", default="todos/tests/random_test.py")
+    parser.add_argument("--seeds", type=int, default=20, help="number of shuffled runs")
+    parser.add_argument("--first-seed", type=int, default=None, help="run seeds from here on (default: random)")
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--no-minimize", action="store_true", help="only record the failing seeds")
+    parser.add_argument("--json", metavar="PATH", help="write the findings as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"], default=client.BACKEND)
+    args = parser.parse_args(argv)
+
+    first = args.first_seed if args.first_seed is not None else random.randrange(2 ** 32)
+    seeds = [first + i for i in range(args.seeds)]
+    workers = queue.Queue()
+    for index in range(args.workers):
+        workers.put(Worker(index, args.backend))
+
+    def on_worker(fn, *fn_args):
+        worker = workers.get()
+        try:
+            return fn(worker, *fn_args)
+        finally:
+            workers.put(worker)
+
+    start = time.perf_counter()
+    findings = []
+    intrinsic = []
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            runs = list(pool.map(lambda seed: on_worker(run_pytest, ["--random-seed", str(seed), args.path]), seeds))
+            failing = {seed: (order, failed) for seed, (order, failed, _) in zip(seeds, runs) if failed}
+            for seed, (_, failed) in sorted(failing.items()):
+                print(f"seed {seed}: {len(failed)} failed", file=sys.stderr)
+
+            # a test that also fails on its own does not depend on the order
+            suspects = sorted({node for _, failed in failing.values() for node in failed})
+            alone = dict(zip(suspects, pool.map(lambda node: on_worker(fails_after, [], node), suspects)))
+            intrinsic = [node for node in suspects if alone[node]]
+
+            if not args.no_minimize:
+                # one order per test is enough to find what it depends on
+                cases = {}
+                for seed, (order, failed) in sorted(failing.items()):
+                    for node in failed:
+                        if not alone[node] and node not in cases:
+                            cases[node] = (seed, order[:order.index(node)])
+                minimized = pool.map(lambda node: on_worker(minimize, cases[node][1], node), list(cases))
+                for node, (sequence, bisect_runs) in zip(cases, minimized):
+                    findings.append({
+                        "test": node,
+                        "seed": cases[node][0],
+                        "after": sequence,
+                        "bisect_runs": bisect_runs,
+                    })
+    finally:
+        while not workers.empty():
+            workers.get().stop()
+    elapsed = time.perf_counter() - start
+
+    print(f"\nseeds {seeds[0]}..{seeds[-1]}: {len(failing)} of {len(seeds)} runs failed in {elapsed:.1f}s")
+    if intrinsic:
+        print("\nfail in any order:")
+        for node in intrinsic:
+            print(f"  {node}")
+    if findings:
+        print("\norder dependent (fails when run after):")
+        rows = [
+            {"test": f["test"].split("::")[-1], "seed": f["seed"],
+             "after": "(did not fail again, flaky)" if f["after"] is None
+             else " -> ".join(n.split("::")[-1] for n in f["after"]),
+             "bisect_runs": f["bisect_runs"]}
+            for f in findings
+        ]
+        print_table(rows, ["test", "seed", "after", "bisect_runs"])
+        for f in findings:
+            if f["after"] is not None:
+                print(f"reproduce: python -m pytest --keep-order {' '.join(f['after'])} {f['test']}")
+    if args.json:
+        write_json(args.json, {
+            "path": args.path,
+            "backend": args.backend,
+            "seeds": seeds,
+            "failing_seeds": {str(seed): sorted(failed) for seed, (_, failed) in failing.items()},
+            "intrinsic": intrinsic,
+            "order_dependent": findings,
+        })
+    return 1 if failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import client, server
+from common.histogram import Histogram
+from common.summary import write_latency
+
+# parallel runner for the suites against a single todo manager instance
+#
+# the tests of each directory are split into chunks that run in separate
+# pytest processes. every process gets its own TODO_API_NAMESPACE so global
+# listings and state restores only touch the entities it created itself.
+# arguments after -- are passed on to every pytest process.
+#
+# usage (from PART_A): python -m common.parallel -n 4 todos/tests projects/tests -- -x
+
+PART_A = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def collect(path):
+    result = subprocess.run(
+        [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider", path],
+        cwd=PART_A,
+        capture_output=True,
+        text=True,
+    )
+    # a mistyped path or a module that fails to import is not an empty run
+    if result.returncode != 0:
+        raise RuntimeError(f"collecting {path} failed:\n{result.stdout}{result.stderr}")
+    return [line for line in result.stdout.splitlines() if "::" in line]
+
+
+def split(node_ids, workers):
+    # contiguous chunks keep a module's tests (and its fixtures) together
+    size = max(1, -(-len(node_ids) // workers))
+    return [node_ids[i:i + size] for i in range(0, len(node_ids), size)]
+
+
+def run_chunk(index, node_ids, extra_args):
+    env = dict(os.environ, TODO_API_NAMESPACE=f"worker{index}")
+    fd, results_path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    try:
+        output = subprocess.run(
+            [sys.executable, "-m", "pytest", "-q", "-p", "no:cacheprovider",
+             "--summary-json", results_path, *extra_args, *node_ids],
+            cwd=PART_A,
+            env=env,
+            capture_output=True,
+            text=True,
+        )
+        with open(results_path) as f:
+            text = f.read()
+        results = json.loads(text) if text else {"results": []}
+    finally:
+        os.remove(results_path)
+    return output, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="run the suites in parallel worker processes")
+    parser.add_argument("paths", nargs="*", default=["todos/tests", "projects/tests"])
+    parser.add_argument("-n", "--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("-v", "--verbose", action="store_true", help="print the output of every worker")
+    parser.add_argument(
+        "--start-server", action="store_true", help="boot the jar once and share it between all workers"
+    )
+    parser.add_argument("--backend", choices=["http", "fake"], help="passed on to every worker")
+    argv = sys.argv[1:] if argv is None else list(argv)
+    # everything after -- is for pytest, so its option values are never taken as paths
+    extra_args = argv[argv.index("--") + 1:] if "--" in argv else []
+    args = parser.parse_args(argv[:argv.index("--")] if "--" in argv else argv)
+    if args.backend:
+        client.configure(backend=args.backend)
+        extra_args = ["--backend", args.backend, *extra_args]
+
+    # a directory per chunk, the suites share test module names
+    chunks = []
+    try:
+        for path in args.paths:
+            chunks += split(collect(path), args.workers)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not chunks:
+        print(f"no tests collected from {' '.join(args.paths)}", file=sys.stderr)
+        return 2
+
+    # the workers inherit TODO_API_URL of the server started here
+    if args.start_server and client.BACKEND != "fake":
+        server.ensure_running()
+    start = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            futures = [
+                pool.submit(run_chunk, index, node_ids, extra_args)
+                for index, node_ids in enumerate(chunks)
+            ]
+            runs = [future.result() for future in futures]
+    finally:
+        server.shutdown()
+    elapsed = time.perf_counter() - start
+
+    passed_tests = 0
+    failed_tests = 0
+    latency = Histogram()
+    print("")
+    for output, results in runs:
+        if args.verbose or (output.returncode not in (0, 1) and not results["results"]):
+            print(output.stdout + output.stderr)
+        if "latency" in results:
+            latency.merge(Histogram.from_dict(results["latency"]))
+        for status, name, message in results["results"]:
+            if status == "FAILED":
+                print(f"Test {name}: FAILED - {message}")
+                failed_tests += 1
+            elif status == "PASSED":
+                print(f"Test {name}: PASSED")
+                passed_tests += 1
+
+    print("\nSummary:")
+    print(f"Total tests run: {passed_tests + failed_tests}")
+    print(f"Passed: {passed_tests}")
+    print(f"Failed: {failed_tests}")
+    write_latency(print, latency)
+    print(f"Workers: {args.workers}, chunks: {len(chunks)}, wall time: {elapsed:.2f}s")
+    return 1 if failed_tests or any(o.returncode not in (0, 1) for o, _ in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
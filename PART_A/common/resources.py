@@ -0,0 +1,178 @@
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+from common import client, server
+
+# resource monitor for the todo manager process
+#
+# samples the cpu time, resident memory, thread count and open file
+# descriptors of the server from /proc at a fixed interval, together with the
+# number and p99 latency of the requests the client made in that interval, so
+# memory growth and resource spikes can be lined up with latency.
+#
+# the jar started by --start-server is watched directly, a jar started
+# elsewhere is found through the port it listens on. with the fake backend
+# the server is this process.
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+_monitor = None
+
+
+def listening_pid(port):
+    # the process owning the socket listening on port, from /proc/net/tcp*
+    inodes = set()
+    for table in ("/proc/net/tcp", "/proc/net/tcp6"):
+        try:
+            with open(table) as f:
+                lines = f.readlines()[1:]
+        except OSError:
+            continue
+        for line in lines:
+            fields = line.split()
+            # state 0A is LISTEN
+            if fields[3] == "0A" and int(fields[1].rsplit(":", 1)[1], 16) == port:
+                inodes.add(f"socket:[{fields[9]}]")
+    for pid in filter(str.isdigit, os.listdir("/proc")):
+        try:
+            for fd in os.listdir(f"/proc/{pid}/fd"):
+                if os.readlink(f"/proc/{pid}/fd/{fd}") in inodes:
+                    return int(pid)
+        except OSError:
+            continue
+    return None
+
+
+def server_pid():
+    if client.BACKEND == "fake":
+        return os.getpid()
+    if os.environ.get("TODO_API_PID"):
+        return int(os.environ["TODO_API_PID"])
+    if server._server is not None and server._server.process is not None:
+        return server._server.process.pid
+    return listening_pid(urlsplit(client.API_URL).port or 80)
+
+
+def read_process(pid):
+    # (cpu seconds, rss in MB, threads, open fds) of pid
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+    rss = 0.0
+    threads = 0
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                rss = int(line.split()[1]) / 1024
+            elif line.startswith("Threads:"):
+                threads = int(line.split()[1])
+    try:
+        fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except PermissionError:
+        fds = None
+    return cpu, rss, threads, fds
+
+
+class ProcessMonitor:
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        if self.thread.is_alive():
+            self.stopped.set()
+            self.thread.join()
+        return self
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _run(self):
+        start = time.perf_counter()
+        last_cpu, last_time = None, start
+        last_latency = client.LATENCY.copy()
+        while True:
+            finished = self.stopped.is_set()
+            now = time.perf_counter()
+            try:
+                cpu, rss, threads, fds = read_process(self.pid)
+            except OSError:
+                # the process is gone
+                return
+            latency = client.LATENCY.copy()
+            interval = latency.since(last_latency)
+            self.samples.append({
+                "t": round(now - start, 3),
+                "cpu_s": round(cpu, 2),
+                "cpu_percent": round((cpu - last_cpu) / (now - last_time) * 100, 1) if last_cpu is not None else 0.0,
+                "rss_mb": round(rss, 1),
+                "threads": threads,
+                "fds": fds,
+                "requests": interval.count,
+                "p99_ms": round(interval.percentile(99) * 1000, 3),
+            })
+            last_cpu, last_time, last_latency = cpu, now, latency
+            if finished:
+                return
+            # one last sample is taken once stop is called
+            self.stopped.wait(self.interval)
+
+    def summary(self):
+        if not self.samples:
+            return {}
+        first, last = self.samples[0], self.samples[-1]
+        fds = [s["fds"] for s in self.samples if s["fds"] is not None]
+        return {
+            "pid": self.pid,
+            "samples": len(self.samples),
+            "seconds": last["t"],
+            "cpu_s": round(last["cpu_s"] - first["cpu_s"], 2),
+            "rss_start_mb": first["rss_mb"],
+            "rss_end_mb": last["rss_mb"],
+            "rss_peak_mb": max(s["rss_mb"] for s in self.samples),
+            "threads_max": max(s["threads"] for s in self.samples),
+            "fds_max": max(fds) if fds else None,
+        }
+
+    def report(self):
+        return {"summary": self.summary(), "interval": self.interval, "samples": self.samples}
+
+
+def start(interval):
+    # starts the session monitor when interval is set, returns it or None
+    global _monitor
+    if interval and _monitor is None:
+        pid = server_pid()
+        if pid is None:
+            raise RuntimeError(f"no process is listening at {client.API_URL}, set TODO_API_PID")
+        _monitor = ProcessMonitor(pid, interval).start()
+    return _monitor
+
+
+def stop():
+    # stops the session monitor, returns its report (None when not running)
+    global _monitor
+    if _monitor is None:
+        return None
+    monitor, _monitor = _monitor, None
+    return monitor.stop().report()
+
+
+def describe(summary):
+    return (
+        f"server pid {summary['pid']}: rss {summary['rss_start_mb']} -> {summary['rss_end_mb']} MB "
+        f"(peak {summary['rss_peak_mb']}), threads max {summary['threads_max']}, "
+        f"fds max {summary['fds_max']}, cpu {summary['cpu_s']}s over {summary['seconds']}s"
+    )
@@ -0,0 +1,155 @@
+import os
+import socket
+import subprocess
+import time
+from urllib.parse import urlsplit
+
+import requests
+
+from common import client
+
+# lifecycle of the todo manager jar for a test or benchmark session
+#
+# boots runTodoManagerRestAPI-1.5.5.jar once on a free port, polls it with a
+# short backoff until the first 200 and shuts it down exactly once at the end.
+# a server that is already answering at the configured url is reused and left
+# running for whoever started it.
+
+JAR_NAME = "runTodoManagerRestAPI-1.5.5.jar"
+PART_A = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JAR_CANDIDATES = [
+    os.path.join(PART_A, JAR_NAME),
+    os.path.join(os.path.dirname(PART_A), JAR_NAME),
+    os.path.join(os.getcwd(), JAR_NAME),
+]
+STARTUP_TIMEOUT = float(os.environ.get("TODO_API_STARTUP_TIMEOUT", "60"))
+# startup time assumed for a jar this process has not booted itself
+STARTUP_ESTIMATE = float(os.environ.get("TODO_API_STARTUP_ESTIMATE", "3"))
+
+_server = None
+
+
+def find_jar():
+    jar = os.environ.get("TODO_MANAGER_JAR")
+    if jar:
+        return jar
+    for candidate in JAR_CANDIDATES:
+        if os.path.exists(candidate):
+            return candidate
+    raise FileNotFoundError(f"{JAR_NAME} not found, set TODO_MANAGER_JAR to its path")
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def is_ready(url):
+    try:
+        return client.get(url, timeout=1).status_code == 200
+    except requests.RequestException:
+        return False
+
+
+def wait_until_ready(url, process=None, timeout=STARTUP_TIMEOUT, first_delay=0.01, max_delay=0.2):
+    # returns the seconds until the first 200
+    start = time.perf_counter()
+    delay = first_delay
+    while not is_ready(url):
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"todo manager exited with code {process.returncode} during startup")
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError(f"todo manager at {url} not ready after {timeout}s")
+        time.sleep(delay)
+        delay = min(delay * 2, max_delay)
+    return time.perf_counter() - start
+
+
+def wait_until_stopped(url, timeout=STARTUP_TIMEOUT, delay=0.05):
+    start = time.perf_counter()
+    while is_ready(url):
+        if time.perf_counter() - start > timeout:
+            raise RuntimeError(f"todo manager at {url} still answering after {timeout}s")
+        time.sleep(delay)
+
+
+class TodoManagerServer:
+    def __init__(self, jar=None, port=None):
+        self.jar = jar or find_jar()
+        self.port = port or free_port()
+        self.url = f"http://localhost:{self.port}"
+        self.process = None
+        self.startup_seconds = None
+
+    def start(self):
+        self.process = subprocess.Popen(
+            ["java", "-jar", self.jar, f"-port={self.port}"],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            self.startup_seconds = wait_until_ready(self.url, self.process)
+        except RuntimeError:
+            self.stop()
+            raise
+        return self
+
+    def stop(self):
+        if self.process is None:
+            return
+        process, self.process = self.process, None
+        try:
+            client.get(self.url + "/shutdown", timeout=2)
+        except requests.RequestException:
+            # the jar drops the connection while shutting down
+            pass
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def restart(self):
+        # also works for a jar started by someone else on this port
+        if self.process is not None:
+            self.stop()
+        else:
+            try:
+                client.get(self.url + "/shutdown", timeout=2)
+            except requests.RequestException:
+                pass
+            wait_until_stopped(self.url)
+        return self.start()
+
+
+def ensure_running():
+    # start the jar unless one is already answering at the client url,
+    # returns the server this session owns (None when reusing one)
+    global _server
+    if _server is not None or is_ready(client.API_URL):
+        return _server
+    _server = TodoManagerServer().start()
+    client.configure(base_url=_server.url)
+    os.environ["TODO_API_URL"] = _server.url
+    return _server
+
+
+def adopt(jar=None):
+    # take charge of the jar at the client url so it can be restarted on the
+    # same port, booting it there if nothing answers. unlike ensure_running's
+    # server it is left running when the process exits
+    global _server
+    if _server is None:
+        _server = TodoManagerServer(jar, urlsplit(client.API_URL).port)
+        if not is_ready(_server.url):
+            _server.start()
+    return _server
+
+
+def shutdown():
+    # stops the server started by ensure_running, only once
+    global _server
+    if _server is not None:
+        _server.stop()
+        _server = None
@@ -0,0 +1,313 @@
+import argparse
+import gzip
+import hashlib
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client, server
+from common.stats import print_table, write_json
+
+# snapshot/diff/restore of the todo manager state
+#
+# entities are indexed by id with a content hash, so diffing two snapshots is
+# linear in the number of entities instead of comparing every dict with every
+# other one. only entities in the client namespace are considered.
+#
+# snapshots can be saved to a gzipped json file and rebuilt from it on another
+# server or later: everything is wiped and recreated concurrently, and since
+# the server assigns new ids the old ids are mapped to the new ones. a restart
+# of the server replaces the wipe when it is estimated to be quicker, for the
+# fake, a jar started by the session or the jar given with --jar.
+#
+# usage (from PART_A): python -m common.state save state.json.gz
+#                      python -m common.state load state.json.gz --workers 16 --jar
+
+KINDS = ("todos", "projects", "categories")
+BOOLEAN_FIELDS = ("doneStatus", "completed", "active")
+
+# (kind, relationship) -> kind of the related entities
+RELATED = {
+    ("todos", "categories"): "categories",
+    ("todos", "tasksof"): "projects",
+    ("projects", "tasks"): "todos",
+    ("projects", "categories"): "categories",
+    ("categories", "todos"): "todos",
+    ("categories", "projects"): "projects",
+}
+# projects/:id/tasks mirrors todos/:id/tasksof, restoring one side is enough
+MIRRORED = {("projects", "tasks")}
+
+
+def _normalize(entity):
+    # relationship lists come back in no particular order
+    normalized = {}
+    for key, value in entity.items():
+        if isinstance(value, list):
+            value = sorted(str(item["id"]) for item in value)
+        normalized[key] = value
+    return normalized
+
+
+def _content_hash(entity):
+    return hashlib.sha1(json.dumps(entity, sort_keys=True).encode()).hexdigest()
+
+
+def take_snapshot(kinds=KINDS):
+    # {kind: {id: (content hash, normalized entity)}}
+    snapshot = {}
+    for kind in kinds:
+        response = client.get(f"/{kind}")
+        assert response.status_code == 200, f"GET /{kind} failed"
+        entities = {}
+        for entity in response.json().get(kind, []):
+            if client.in_namespace(kind, entity["id"]):
+                normalized = _normalize(entity)
+                entities[str(entity["id"])] = (_content_hash(normalized), normalized)
+        snapshot[kind] = entities
+    return snapshot
+
+
+def diff(before, after):
+    # {kind: {"added": [...], "removed": [...], "modified": [...]}}
+    changes = {}
+    for kind in before.keys() | after.keys():
+        old = before.get(kind, {})
+        new = after.get(kind, {})
+        changes[kind] = {
+            "added": [i for i in new if i not in old],
+            "removed": [i for i in old if i not in new],
+            "modified": [i for i in new if i in old and new[i][0] != old[i][0]],
+        }
+    return changes
+
+
+def _fields(entity):
+    fields = {}
+    for key, value in entity.items():
+        if key == "id" or isinstance(value, list):
+            continue
+        fields[key] = value == "true" if key in BOOLEAN_FIELDS else value
+    return fields
+
+
+def _restore_entity(kind, entity_id, old, new, existing):
+    # existing: {kind: ids that are still on the server after the restore}
+    if _fields(old) != _fields(new):
+        client.post(f"/{kind}/{entity_id}", json=_fields(old))
+    for relationship in old.keys() | new.keys():
+        target = RELATED.get((kind, relationship))
+        if target is None or (kind, relationship) in MIRRORED:
+            continue
+        old_links = set(old.get(relationship, []))
+        new_links = set(new.get(relationship, []))
+        for target_id in new_links - old_links:
+            # links to deleted entities went away with them
+            if target_id in existing[target]:
+                client.delete(f"/{kind}/{entity_id}/{relationship}/{target_id}")
+        for target_id in old_links - new_links:
+            # links to entities deleted since the snapshot cannot come back
+            if target_id in existing[target]:
+                client.post(f"/{kind}/{entity_id}/{relationship}", json={"id": target_id})
+
+
+def restore(snapshot):
+    # delete what was added, put modified entities and their links back and
+    # return the diff that was undone. entities deleted since the snapshot
+    # cannot be recreated under their old id and are only reported
+    current = take_snapshot(snapshot.keys())
+    changes = diff(snapshot, current)
+
+    existing = {}
+    for kind, kind_changes in changes.items():
+        for entity_id in kind_changes["added"]:
+            client.delete(f"/{kind}/{entity_id}")
+        added = set(kind_changes["added"])
+        existing[kind] = {i for i in current[kind] if i not in added}
+
+    # links into kinds outside the snapshot are left alone
+    for kind in KINDS:
+        existing.setdefault(kind, set())
+
+    for kind, kind_changes in changes.items():
+        for entity_id in kind_changes["modified"]:
+            old = snapshot[kind][entity_id][1]
+            new = current[kind][entity_id][1]
+            _restore_entity(kind, entity_id, old, new, existing)
+    return changes
+
+
+#### SAVE AND REBUILD ####
+
+
+def save(snapshot, path):
+    with gzip.open(path, "wt") as f:
+        json.dump({kind: {i: entity for i, (_, entity) in entities.items()} for kind, entities in snapshot.items()},
+                  f, separators=(",", ":"))
+
+
+def load(path):
+    with gzip.open(path, "rt") as f:
+        data = json.load(f)
+    return {kind: {i: (_content_hash(entity), entity) for i, entity in entities.items()}
+            for kind, entities in data.items()}
+
+
+def _parallel(name, function, items, workers, report):
+    # runs function over items on the pool, returns the results and adds a
+    # row to report
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(function, items))
+    elapsed = time.perf_counter() - start
+    report.append({"phase": name, "requests": len(items), "errors": results.count(None),
+                   "seconds": round(elapsed, 3)})
+    return results
+
+
+def _send(method, path, body=None):
+    # the response, or None when the request failed
+    try:
+        response = client.request(method, path, json=body)
+    except requests.RequestException:
+        return None
+    return response if response.status_code in (200, 201) else None
+
+
+def wipe(workers=16, report=None):
+    # delete every entity in the namespace, returns how many were deleted
+    current = take_snapshot()
+    paths = [f"/{kind}/{i}" for kind, entities in current.items() for i in entities]
+    results = _parallel("wipe", lambda path: _send("DELETE", path), paths, workers,
+                        report if report is not None else [])
+    return len(paths) - results.count(None)
+
+
+def rebuild(snapshot, workers=16, report=None):
+    # create the entities of snapshot and then their links on an empty server,
+    # returns {kind: {old id: new id}}
+    report = report if report is not None else []
+    entities = [(kind, i, entity) for kind, by_id in snapshot.items() for i, (_, entity) in by_id.items()]
+
+    def create(item):
+        kind, _, entity = item
+        response = _send("POST", f"/{kind}", _fields(entity))
+        return str(response.json()["id"]) if response is not None else None
+
+    remap = {kind: {} for kind in KINDS}
+    for (kind, old_id, _), new_id in zip(entities, _parallel("create", create, entities, workers, report)):
+        if new_id is not None:
+            remap[kind][old_id] = new_id
+
+    links = []
+    for kind, old_id, entity in entities:
+        for relationship, targets in entity.items():
+            target = RELATED.get((kind, relationship))
+            if target is None or (kind, relationship) in MIRRORED or old_id not in remap[kind]:
+                continue
+            for target_id in targets:
+                # links to entities outside the snapshot are dropped
+                if target_id in remap[target]:
+                    links.append((f"/{kind}/{remap[kind][old_id]}/{relationship}", remap[target][target_id]))
+    _parallel("link", lambda link: _send("POST", link[0], {"id": link[1]}), links, workers, report)
+    return remap
+
+
+def _can_restart():
+    # a restart wipes the whole server, never do it under another run's feet
+    return not client.NAMESPACE and (client.BACKEND == "fake" or server._server is not None)
+
+
+def _restart():
+    # the server comes back with its initial data, returns the seconds it took
+    if client.BACKEND == "fake":
+        start = time.perf_counter()
+        client.get_fake_adapter().server.reset()
+        return time.perf_counter() - start
+    server._server.restart()
+    return server._server.startup_seconds
+
+
+def _seconds_per_request(current, workers, samples=64):
+    # time concurrent reads of existing entities, deletes cost about the same
+    paths = [f"/{kind}/{i}" for kind, entities in current.items() for i in entities][:samples]
+    if not paths:
+        return 0.0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(lambda path: _send("GET", path), paths))
+    return (time.perf_counter() - start) / len(paths)
+
+
+def reset(snapshot, workers=16, mode="auto"):
+    # put the server back to snapshot by wiping it (or restarting it) and
+    # rebuilding everything, returns (remap, report rows, mode used)
+    report = []
+    if mode == "auto":
+        mode = "restore"
+        if _can_restart():
+            current = take_snapshot()
+            startup = 0.0 if client.BACKEND == "fake" else server._server.startup_seconds or server.STARTUP_ESTIMATE
+            wipe_seconds = sum(len(e) for e in current.values()) * _seconds_per_request(current, workers)
+            # a restart still leaves the initial data to wipe, a few entities
+            if startup < wipe_seconds:
+                mode = "restart"
+    elif mode == "restart" and not _can_restart():
+        raise RuntimeError("only the fake or a server started by this session (or given with --jar) can be restarted")
+    start = time.perf_counter()
+    if mode == "restart":
+        seconds = _restart()
+        report.append({"phase": "restart", "requests": 0, "errors": 0, "seconds": round(seconds, 3)})
+    wipe(workers, report)
+    remap = rebuild(snapshot, workers, report)
+    report.append({"phase": "total", "requests": sum(row["requests"] for row in report),
+                   "errors": sum(row["errors"] for row in report),
+                   "seconds": round(time.perf_counter() - start, 3)})
+    return remap, report, mode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="save the server state to a file or put it back from one")
+    parser.add_argument("action", choices=["save", "load"])
+    parser.add_argument("path", help="gzipped json snapshot")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent requests while restoring")
+    parser.add_argument("--mode", choices=["auto", "restore", "restart"], default="auto",
+                        help="wipe with deletes or by restarting the server (auto: whichever is estimated quicker). "
+                             "restarts need the fake backend or --jar")
+    parser.add_argument("--jar", metavar="PATH", nargs="?", const="",
+                        help="the jar of the server at the url (found as for --start-server without PATH), it is booted "
+                             "there if nothing answers and can then be restarted on the same port. it is left running")
+    parser.add_argument("--remap", metavar="PATH", help="write the old to new id mapping as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.workers))
+
+    if args.action == "save":
+        start = time.perf_counter()
+        snapshot = take_snapshot()
+        save(snapshot, args.path)
+        counts = ", ".join(f"{len(snapshot[kind])} {kind}" for kind in KINDS)
+        print(f"saved {counts} to {args.path} in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    snapshot = load(args.path)
+    try:
+        if args.jar is not None and client.BACKEND != "fake":
+            server.adopt(args.jar or None)
+        remap, report, mode = reset(snapshot, args.workers, args.mode)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 2
+    print_table(report, ["phase", "requests", "errors", "seconds"])
+    entities = sum(len(snapshot[kind]) for kind in snapshot)
+    print(f"\n{entities} entities restored ({mode}) in {report[-1]['seconds']}s")
+    if args.remap:
+        write_json(args.remap, remap)
+    return 1 if report[-1]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+import json
+
+from common.histogram import Histogram
+
+# latency statistics and report output shared by the benchmarks and the
+# tools in common (perf.stats re-exports them)
+
+
+def summarize(latencies, errors=0, elapsed=None):
+    # latencies in seconds (a Histogram or a list), reported in milliseconds
+    histogram = latencies if isinstance(latencies, Histogram) else Histogram.of(latencies)
+    count = histogram.count
+    elapsed = elapsed if elapsed is not None else histogram.total()
+    return {
+        "count": count,
+        "errors": errors,
+        "mean_ms": round(histogram.mean() * 1000, 3),
+        "p50_ms": round(histogram.percentile(50) * 1000, 3),
+        "p95_ms": round(histogram.percentile(95) * 1000, 3),
+        "p99_ms": round(histogram.percentile(99) * 1000, 3),
+        "max_ms": round(histogram.maximum() * 1000, 3),
+        "throughput_rps": round(count / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def print_table(rows, columns):
+    # rows are dicts, columns the keys to print in order
+    widths = [max([len(str(c))] + [len(str(row.get(c, ""))) for row in rows]) for c in columns]
+    print("  ".join(str(c).ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(row.get(c, "")).ljust(w) for c, w in zip(columns, widths)))
+
+
+def write_json(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f, indent=2)
@@ -0,0 +1,125 @@
+import json
+import random
+
+from common import client, resources
+
+# pytest plugin that prints the pass/fail summary of the suites
+#
+# results are collected from the test reports of the single pytest run, so no
+# module has to call its test functions a second time to count them
+
+_results = {}
+_seed = None
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--summary-json",
+        metavar="PATH",
+        help="also write the summary results to PATH as json",
+    )
+    parser.addoption(
+        "--random-seed",
+        type=int,
+        default=None,
+        help="seed for the order of the random_order tests (default: a new seed, printed in the summary)",
+    )
+    parser.addoption(
+        "--keep-order",
+        action="store_true",
+        help="run the random_order tests in the order they were given instead of shuffling them",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "random_order: run the marked tests in a shuffled order"
+    )
+
+
+def pytest_collection_modifyitems(session, config, items):
+    # shuffle the random_order tests among the slots they already occupy
+    global _seed
+    slots = [i for i, item in enumerate(items) if item.get_closest_marker("random_order")]
+    if not slots or config.getoption("keep_order"):
+        return
+    _seed = config.getoption("random_seed")
+    if _seed is None:
+        _seed = random.randrange(2 ** 32)
+    shuffled = [items[i] for i in slots]
+    random.Random(_seed).shuffle(shuffled)
+    for i, item in zip(slots, shuffled):
+        items[i] = item
+
+
+def _failure_message(report):
+    crash = getattr(report.longrepr, "reprcrash", None)
+    message = crash.message if crash is not None else str(report.longrepr)
+    message = message.split("\n")[0]
+    if message.startswith("AssertionError: "):
+        message = message[len("AssertionError: "):]
+    return message
+
+
+def pytest_runtest_logreport(report):
+    # a test counts once, failing in any phase fails it
+    name = report.nodeid.split("::")[-1]
+    if report.failed:
+        if _results.get(report.nodeid, ("",))[0] != "FAILED":
+            _results[report.nodeid] = ("FAILED", name, _failure_message(report))
+    elif report.skipped:
+        _results.setdefault(report.nodeid, ("SKIPPED", name, ""))
+    elif report.when == "call":
+        _results[report.nodeid] = ("PASSED", name, "")
+
+
+def get_results():
+    return list(_results.values())
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    usage = resources.stop()
+    path = config.getoption("summary_json")
+    if path:
+        with open(path, "w") as f:
+            json.dump({
+                "results": [list(result) for result in _results.values()],
+                "order": list(_results),
+                "seed": _seed,
+                "resources": usage,
+                "latency": client.LATENCY.to_dict(),
+            }, f)
+    if not _results:
+        return
+    write = terminalreporter.write_line
+    passed_tests = 0
+    failed_tests = 0
+
+    write("")
+    for status, name, message in _results.values():
+        if status == "FAILED":
+            write(f"Test {name}: FAILED - {message}")
+            failed_tests += 1
+        elif status == "PASSED":
+            write(f"Test {name}: PASSED")
+            passed_tests += 1
+        else:
+            write(f"Test {name}: SKIPPED")
+
+    write("\nSummary:")
+    write(f"Total tests run: {passed_tests + failed_tests}")
+    write(f"Passed: {passed_tests}")
+    write(f"Failed: {failed_tests}")
+    if _seed is not None:
+        write(f"Random order seed: {_seed} (rerun with --random-seed {_seed})")
+    write_latency(write, client.LATENCY)
+    if usage and usage["summary"]:
+        write(f"Resources: {resources.describe(usage['summary'])}")
+
+
+def write_latency(write, histogram):
+    if histogram.count:
+        write(
+            f"Request latency: {histogram.count} requests, p50 {histogram.percentile(50) * 1000:.2f}ms, "
+            f"p99 {histogram.percentile(99) * 1000:.2f}ms, max {histogram.maximum() * 1000:.2f}ms"
+        )
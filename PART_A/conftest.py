@@ -0,0 +1,105 @@
+import os
+import warnings
+
+import pytest
+
+from common import client, resources, server
+from common.cleanup import CleanupRegistry
+from common.entity_pool import EntityPool, Lease
+
+# shared pytest setup for the todos and projects suites
+pytest_plugins = ["common.summary"]
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--backend",
+        choices=["http", "fake"],
+        default=None,
+        help="run against the jar over http or the in-memory fake (default: TODO_API_BACKEND or http)",
+    )
+    parser.addoption(
+        "--start-server",
+        action="store_true",
+        default=os.environ.get("TODO_API_START_SERVER") == "1",
+        help="boot the jar on a free port for the session unless one is already running",
+    )
+    parser.addoption(
+        "--monitor",
+        type=float,
+        metavar="SECONDS",
+        default=float(os.environ.get("TODO_API_MONITOR", "0")),
+        help="sample the server's cpu, memory, threads and fds every SECONDS into the summary",
+    )
+    parser.addoption("--record", metavar="PATH", help="record every exchange to the cassette PATH")
+    parser.addoption("--replay", metavar="PATH", help="answer every request from the cassette PATH")
+
+
+def pytest_configure(config):
+    backend = config.getoption("backend")
+    if backend is not None:
+        client.configure(backend=backend)
+    if config.getoption("record"):
+        client.configure(cassette=config.getoption("record"), cassette_mode="record")
+    elif config.getoption("replay"):
+        client.configure(cassette=config.getoption("replay"), cassette_mode="replay")
+    replaying = client.CASSETTE and client.CASSETTE_MODE == "replay"
+    # before collection, so the test modules pick up the server url
+    if config.getoption("start_server") and client.BACKEND != "fake" and not replaying:
+        try:
+            server.ensure_running()
+        except (OSError, RuntimeError) as e:
+            raise pytest.UsageError(f"could not start the todo manager: {e}")
+    if not replaying:
+        try:
+            resources.start(config.getoption("monitor"))
+        except (OSError, RuntimeError) as e:
+            raise pytest.UsageError(f"could not monitor the todo manager: {e}")
+
+
+def pytest_unconfigure(config):
+    resources.stop()
+    client.close_cassette()
+    server.shutdown()
+
+
+def pytest_report_header(config):
+    if server._server is not None:
+        return f"todo manager: started {server.JAR_NAME} at {server._server.url} in {server._server.startup_seconds:.2f}s"
+    return f"todo manager: {client.API_URL} ({client.BACKEND})"
+
+
+# deletes whatever a test created once it ends, even if it failed midway
+@pytest.fixture(autouse=True)
+def cleanup_registry():
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    try:
+        yield registry
+    finally:
+        client.remove_listener(registry)
+        failures = registry.teardown()
+        if failures:
+            warnings.warn(f"cleanup failed for {failures}")
+
+
+# pre-created entities shared by the tests of a module, see common/entity_pool.py.
+# a module lists what to create up front as POOLED = [(kind, count, fields), ...]
+@pytest.fixture(scope="module")
+def entity_pool(request):
+    pool = EntityPool()
+    try:
+        pool.prefill(getattr(request.module, "POOLED", []))
+        yield pool
+    finally:
+        pool.close()
+
+
+# entities a test takes from the pool go back to it (recycled) once it ends
+@pytest.fixture
+def pooled(entity_pool):
+    lease = Lease(entity_pool)
+    try:
+        yield lease
+    finally:
+        lease.release()
@@ -0,0 +1,176 @@
+import argparse
+import sys
+import time
+
+import requests
+
+from common import client, resources
+from common.histogram import Histogram
+from perf.stats import print_table, summarize, write_json
+
+# per-endpoint latency benchmark
+#
+# drives every method/route combination of the documented todos and projects
+# suites (test_documented.py, test_projects_documented_capabilities.py) for a
+# number of iterations after an untimed warm-up that lets the JVM JIT settle,
+# then reports latency percentiles, throughput and error counts.
+#
+# usage (from PART_A): python -m perf.bench_endpoints --iterations 200 --json bench.json
+
+TODO = {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce"}
+PROJECT = {"title": "sed do eiusmod tempo", "description": "si ut aliquip ex eaa"}
+CATEGORY = {"title": ", quis nostrud exerc"}
+UPDATE = {"title": "Updated Title", "description": "Updated description"}
+
+
+def create(path, data):
+    response = client.post(path, json=data)
+    assert response.status_code == 201, f"POST {path} failed during setup"
+    return response.json()["id"]
+
+
+# setup shared by the non-destructive endpoints, created once per run
+def shared_entities():
+    return {
+        "todo": create("/todos", TODO),
+        "project": create("/projects", PROJECT),
+        "category": create("/categories", CATEGORY),
+    }
+
+
+# untimed per-iteration setup for the endpoints that consume an entity
+def fresh_todo(ids):
+    return {"fresh": create("/todos", TODO)}
+
+
+def fresh_project(ids):
+    return {"fresh": create("/projects", PROJECT)}
+
+
+def linked_category(ids):
+    return {"fresh": create(f"/todos/{ids['todo']}/categories", CATEGORY)}
+
+
+def linked_project(ids):
+    return {"fresh": create(f"/todos/{ids['todo']}/tasksof", PROJECT)}
+
+
+def linked_task(ids):
+    return {"fresh": create(f"/projects/{ids['project']}/tasks", TODO)}
+
+
+# (method, route, json body, expected statuses, per-iteration setup)
+ENDPOINTS = [
+    #### TODOS ####
+    ("GET", "/todos", None, [200], None),
+    ("HEAD", "/todos", None, [200], None),
+    ("POST", "/todos", TODO, [201], None),
+    ("GET", "/todos/{todo}", None, [200], None),
+    ("HEAD", "/todos/{todo}", None, [200], None),
+    ("POST", "/todos/{todo}", UPDATE, [200], None),
+    ("PUT", "/todos/{todo}", UPDATE, [200], None),
+    ("DELETE", "/todos/{fresh}", None, [200, 204], fresh_todo),
+    ("GET", "/todos/{todo}/categories", None, [200], None),
+    ("HEAD", "/todos/{todo}/categories", None, [200], None),
+    ("POST", "/todos/{todo}/categories", {"id": "{category}"}, [201], None),
+    ("DELETE", "/todos/{todo}/categories/{fresh}", None, [200, 204], linked_category),
+    ("GET", "/todos/{todo}/tasksof", None, [200], None),
+    ("HEAD", "/todos/{todo}/tasksof", None, [200], None),
+    ("POST", "/todos/{todo}/tasksof", PROJECT, [201], None),
+    ("DELETE", "/todos/{todo}/tasksof/{fresh}", None, [200, 204], linked_project),
+    ("GET", "/todos/10000", None, [404], None),
+    #### PROJECTS ####
+    ("GET", "/projects", None, [200], None),
+    ("HEAD", "/projects", None, [200], None),
+    ("POST", "/projects", PROJECT, [201], None),
+    ("GET", "/projects/{project}", None, [200], None),
+    ("PUT", "/projects/{project}", UPDATE, [200], None),
+    ("DELETE", "/projects/{fresh}", None, [200, 204], fresh_project),
+    ("GET", "/projects/{project}/categories", None, [200], None),
+    ("POST", "/projects/{project}/categories", CATEGORY, [201], None),
+    ("GET", "/projects/{project}/tasks", None, [200], None),
+    ("POST", "/projects/{project}/tasks", TODO, [201], None),
+    ("DELETE", "/projects/{project}/tasks/{fresh}", None, [200, 204], linked_task),
+]
+
+
+def fill(value, ids):
+    if isinstance(value, dict):
+        return {k: fill(v, ids) for k, v in value.items()}
+    if isinstance(value, str):
+        return value.format(**ids)
+    return value
+
+
+def run_endpoint(method, route, body, expected, setup, ids, iterations, warmup):
+    latencies = Histogram()
+    errors = 0
+    timed = 0.0
+    for i in range(warmup + iterations):
+        params = dict(ids, **(setup(ids) if setup else {}))
+        path = route.format(**params)
+        kwargs = {"json": fill(body, params)} if body is not None else {}
+        start = time.perf_counter()
+        try:
+            response = client.request(method, path, **kwargs)
+            ok = response.status_code in expected
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        if i < warmup:
+            continue
+        latencies.record(elapsed)
+        timed += elapsed
+        errors += not ok
+    return summarize(latencies, errors, timed)
+
+
+def cleanup():
+    # delete everything the run created, links go with their entities
+    for kind in ("todos", "projects", "categories"):
+        for entity_id in client.created_ids(kind):
+            client.delete(f"/{kind}/{entity_id}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="per-endpoint latency benchmark")
+    parser.add_argument("--iterations", type=int, default=100)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--only", help="only run routes containing this text, e.g. /projects")
+    parser.add_argument("--json", metavar="PATH", help="write the results as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+    if args.backend:
+        client.configure(backend=args.backend)
+    resources.start(args.monitor)
+
+    ids = shared_entities()
+    rows = []
+    try:
+        for method, route, body, expected, setup in ENDPOINTS:
+            if args.only and args.only not in route:
+                continue
+            result = run_endpoint(method, route, body, expected, setup, ids, args.iterations, args.warmup)
+            rows.append(dict(endpoint=f"{method} {route}", **result))
+    finally:
+        usage = resources.stop()
+        cleanup()
+
+    print_table(rows, ["endpoint", "count", "errors", "p50_ms", "p95_ms", "p99_ms", "max_ms", "throughput_rps"])
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {
+            "api_url": client.API_URL,
+            "backend": client.BACKEND,
+            "iterations": args.iterations,
+            "warmup": args.warmup,
+            "endpoints": rows,
+            "resources": usage,
+        })
+    return 1 if any(row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,201 @@
+import argparse
+import math
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from common.histogram import Histogram
+from perf.stats import print_table, summarize, write_json
+
+# fan-out benchmark of the relationship routes
+#
+# links 10, 100, 1k and 10k new todos to one project (POST /projects/:id/tasks)
+# and as many new categories to one todo (POST /todos/:id/categories), then
+# times reading the relationship route, deleting single links from the heavily
+# linked parent and deleting the parent itself. a single delete is too noisy
+# to fit, so the same children are then linked to new parents one at a time
+# and the median of --deletes parent deletes is taken. the growth exponent of each
+# cost between the largest link counts tells a constant-time lookup (about 0)
+# from a linear scan (about 1). reading the route has to be linear, it returns
+# every linked entity.
+#
+# usage (from PART_A): python -m perf.fanout --sizes 10,100,1000,10000 --workers 16
+
+# (name, parent kind, relationship, kind of the linked entities, parent body, child body)
+FANOUTS = [
+    ("project tasks", "projects", "tasks", "todos",
+     {"title": "sed do eiusmod tempo", "description": "si ut aliquip ex eaa"},
+     {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce"}),
+    ("todo categories", "todos", "categories", "categories",
+     {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce"},
+     {"title": ", quis nostrud exerc", "description": "iusmod tempor incidi"}),
+]
+METRICS = ["get_p50_ms", "unlink_p50_ms", "delete_parent_ms"]
+
+
+def attach(parent_path, body, count, workers):
+    # create count linked entities concurrently, returns their ids
+    def create(_):
+        try:
+            response = client.post(parent_path, json=body)
+        except requests.RequestException:
+            return None
+        return str(response.json()["id"]) if response.status_code == 201 else None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return [i for i in pool.map(create, range(count)) if i is not None]
+
+
+def link(parent_path, children, workers):
+    # link existing entities concurrently, returns how many were linked
+    def post(child):
+        try:
+            return client.post(parent_path, json={"id": child}).status_code == 201
+        except requests.RequestException:
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(pool.map(post, children))
+
+
+def timed(method, path):
+    start = time.perf_counter()
+    try:
+        response = client.request(method, path)
+    except requests.RequestException:
+        return None, None
+    return time.perf_counter() - start, response
+
+
+def measure(fanout, size, samples, unlinks, deletes, workers):
+    name, kind, relationship, target, parent_body, child_body = fanout
+    parent = client.post(f"/{kind}", json=parent_body).json()["id"]
+    path = f"/{kind}/{parent}/{relationship}"
+    start = time.perf_counter()
+    children = attach(path, child_body, size, workers)
+    attach_seconds = time.perf_counter() - start
+
+    reads = Histogram()
+    errors = size - len(children)
+    linked = 0
+    size_bytes = 0
+    for _ in range(samples):
+        elapsed, response = timed("GET", path)
+        if response is None or response.status_code != 200:
+            errors += 1
+            continue
+        reads.record(elapsed)
+        size_bytes = len(response.content)
+        linked = len(response.json().get(target, []))
+
+    # the last links are removed, so the parent keeps nearly all of them
+    removals = Histogram()
+    for child in children[-unlinks:] if unlinks else []:
+        elapsed, response = timed("DELETE", f"{path}/{child}")
+        if response is None or response.status_code != 200:
+            errors += 1
+            continue
+        removals.record(elapsed)
+
+    parent_deletes = Histogram()
+    for n in range(deletes):
+        if n:
+            parent = client.post(f"/{kind}", json=parent_body).json()["id"]
+            errors += len(children) - link(f"/{kind}/{parent}/{relationship}", children, workers)
+        elapsed, response = timed("DELETE", f"/{kind}/{parent}")
+        if response is None or response.status_code != 200:
+            errors += 1
+            continue
+        parent_deletes.record(elapsed)
+    read = summarize(reads)
+    return {
+        "fanout": name,
+        "links": size,
+        "listed": linked,
+        "attach_rps": round(len(children) / attach_seconds, 1) if attach_seconds else 0.0,
+        "get_p50_ms": read["p50_ms"],
+        "get_p95_ms": read["p95_ms"],
+        "bytes": size_bytes,
+        "unlink_p50_ms": summarize(removals)["p50_ms"],
+        "delete_parent_ms": summarize(parent_deletes)["p50_ms"],
+        "errors": errors,
+    }
+
+
+def exponent(rows, metric):
+    # log-log slope between the two largest sizes, where the fixed cost of a
+    # request no longer hides how the per-link cost grows
+    points = [(row["links"], row[metric]) for row in rows if row[metric]]
+    if len(points) < 2:
+        return None
+    (small, small_cost), (large, large_cost) = sorted(points)[-2:]
+    return round(math.log(large_cost / small_cost) / math.log(large / small), 2)
+
+
+def growth(rows):
+    table = []
+    for name, *_ in FANOUTS:
+        own = [row for row in rows if row["fanout"] == name]
+        for metric in METRICS:
+            value = exponent(own, metric)
+            if value is None:
+                continue
+            verdict = "constant" if value < 0.25 else "linear or worse" if value > 0.75 else "sublinear"
+            table.append({"fanout": name, "metric": metric, "exponent": value, "growth": verdict})
+    return table
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="relationship route cost versus the number of links on one parent")
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="links per parent")
+    parser.add_argument("--fanouts", default=",".join(name for name, *_ in FANOUTS))
+    parser.add_argument("--samples", type=int, default=20, help="GETs of the relationship route per size")
+    parser.add_argument("--unlinks", type=int, default=10, help="single links deleted per size")
+    parser.add_argument("--deletes", type=int, default=3, help="heavily linked parents deleted per size, the median is kept")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent creates while linking")
+    parser.add_argument("--json", metavar="PATH", help="write the results as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.workers))
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    fanouts = [fanout for fanout in FANOUTS if fanout[0] in args.fanouts.split(",")]
+    resources.start(args.monitor)
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    rows = []
+    try:
+        for fanout in fanouts:
+            for size in sizes:
+                row = measure(fanout, size, args.samples, min(args.unlinks, size), max(args.deletes, 1), args.workers)
+                rows.append(row)
+                print(f"{row['fanout']} x{size}: get p50 {row['get_p50_ms']}ms, unlink p50 {row['unlink_p50_ms']}ms, "
+                      f"delete parent {row['delete_parent_ms']}ms", file=sys.stderr)
+                # the linked entities outlive their parent, clear them before the next size
+                registry.teardown(args.workers)
+    finally:
+        usage = resources.stop()
+        client.remove_listener(registry)
+        registry.teardown(args.workers)
+
+    print_table(rows, ["fanout", "links", "listed", "attach_rps", "get_p50_ms", "get_p95_ms", "bytes",
+                       "unlink_p50_ms", "delete_parent_ms", "errors"])
+    table = growth(rows)
+    if table:
+        print("")
+        print_table(table, ["fanout", "metric", "exponent", "growth"])
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "samples": args.samples, "results": rows,
+                               "growth": table, "resources": usage})
+    return 1 if any(row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
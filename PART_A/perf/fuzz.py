@@ -0,0 +1,282 @@
+import argparse
+import glob
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from xml.sax.saxutils import escape
+
+import requests
+
+from common import client
+from common.cleanup import CleanupRegistry
+from common.histogram import Histogram
+from perf.stats import print_table, write_json
+
+# malformed payload fuzzer for the POST routes
+#
+# starts from valid json and xml todo, project and category bodies, mutates
+# them (truncation, wrong types, id formats, huge strings, deep nesting, ...)
+# and sends them concurrently. every response is classified, and requests that
+# get a 5xx, time out, drop the connection or take far longer than the rest
+# are written to a corpus directory, the exact body sent next to its details.
+#
+# case n of a run with --seed s is always the same request, so --seed s
+# --case n sends it again, and --replay does so for the whole corpus (against
+# newly created parent todos, projects and categories, whose ids differ).
+#
+# usage (from PART_A): python -m perf.fuzz --count 5000 --threads 16 --corpus fuzz-corpus
+
+# (path, valid body)
+TARGETS = [
+    ("/todos", {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce", "doneStatus": False}),
+    ("/projects", {"title": "sed do eiusmod tempo", "description": "si ut aliquip ex eaa", "completed": False,
+                   "active": True}),
+    ("/categories", {"title": ", quis nostrud exerc", "description": "iusmod tempor incidi"}),
+    ("/todos/{todo}/categories", {"title": ", quis nostrud exerc"}),
+    ("/todos/{todo}/categories", {"id": "{category}"}),
+    ("/projects/{project}/tasks", {"title": "cing elit, sed do ei"}),
+    ("/todos/{todo}/tasksof", {"id": "{project}"}),
+]
+ROOTS = {"todos": "todo", "projects": "project", "categories": "category", "tasks": "todo", "tasksof": "project"}
+CONTENT_TYPES = {"json": "application/json", "xml": "application/xml"}
+
+
+def serialize(data, fmt, root):
+    if fmt == "json":
+        return json.dumps(data).encode()
+    return f"<{root}>{_xml_fields(data)}</{root}>".encode()
+
+
+def _xml_fields(data):
+    if isinstance(data, dict):
+        return "".join(f"<{key}>{_xml_fields(value)}</{key}>" for key, value in data.items())
+    if isinstance(data, list):
+        return "".join(f"<item>{_xml_fields(value)}</item>" for value in data)
+    return escape(json.dumps(data) if not isinstance(data, str) else data)
+
+
+#### MUTATIONS ####
+# each takes (rng, data, fmt, root) and returns the body bytes to send
+
+
+def valid(rng, data, fmt, root):
+    return serialize(data, fmt, root)
+
+
+def truncate(rng, data, fmt, root):
+    body = serialize(data, fmt, root)
+    return body[:rng.randrange(len(body))]
+
+
+def wrong_type(rng, data, fmt, root):
+    data = dict(data)
+    key = rng.choice(list(data))
+    data[key] = rng.choice([0, -1, 1.5, 2 ** 63, True, None, [], {}, ["a"], {"a": 1}, ""])
+    return serialize(data, fmt, root)
+
+
+def id_format(rng, data, fmt, root):
+    # the id formats of test_post_todos_id_categories_with_different_id_formats and more
+    data = dict(data)
+    data["id"] = rng.choice([1, "1", 1.0, "1.0", -1, "-1", 0, " 1", "0x1", "1e3", 2 ** 31, 2 ** 64, "", None, [1]])
+    return serialize(data, fmt, root)
+
+
+def huge_string(rng, data, fmt, root):
+    data = dict(data)
+    data[rng.choice(list(data))] = "x" * rng.choice([2 ** 16, 2 ** 20, 2 ** 22])
+    return serialize(data, fmt, root)
+
+
+def deep_nesting(rng, data, fmt, root):
+    depth = rng.choice([64, 1024, 16384, 100000])
+    key = rng.choice(list(data))
+    if fmt == "json":
+        rest = json.dumps({k: v for k, v in data.items() if k != key})[:-1]
+        head = rest + (", " if len(data) > 1 else "") + json.dumps(key) + ": "
+        return (head + "[" * depth + "]" * depth + "}").encode()
+    return f"<{root}><{key}>{'<a>' * depth}{'</a>' * depth}</{key}></{root}>".encode()
+
+
+def unknown_field(rng, data, fmt, root):
+    return serialize(dict(data, **{rng.choice(["foo", "ID", "Title", "id ", "__proto__", "tasks"]): "x"}), fmt, root)
+
+
+def duplicate_key(rng, data, fmt, root):
+    body = serialize(data, fmt, root)
+    key = rng.choice(list(data))
+    if fmt == "json":
+        return body[:-1] + f', "{key}": 12'.encode() + b"}"
+    return body.replace(f"</{root}>".encode(), f"<{key}>12</{key}></{root}>".encode())
+
+
+def bad_encoding(rng, data, fmt, root):
+    body = bytearray(serialize(data, fmt, root))
+    for _ in range(rng.randint(1, 4)):
+        body[rng.randrange(len(body))] = rng.choice([0x00, 0x80, 0xff, 0xc3, 0x0a, 0x22, 0x3c])
+    return bytes(body)
+
+
+def wrong_content_type(rng, data, fmt, root):
+    # the body of the other format under this content type
+    return serialize(data, "xml" if fmt == "json" else "json", root)
+
+
+def empty(rng, data, fmt, root):
+    return rng.choice([b"", b" ", b"null", b"[]", b"{}", b"<a/>", b"\x00"])
+
+
+MUTATIONS = {
+    "valid": valid,
+    "truncate": truncate,
+    "wrong_type": wrong_type,
+    "id_format": id_format,
+    "huge_string": huge_string,
+    "deep_nesting": deep_nesting,
+    "unknown_field": unknown_field,
+    "duplicate_key": duplicate_key,
+    "bad_encoding": bad_encoding,
+    "wrong_content_type": wrong_content_type,
+    "empty": empty,
+}
+
+
+def make_case(seed, n, ids, mutations):
+    # the request of case n, the same for every run with this seed
+    rng = random.Random(seed * 1000003 + n)
+    path, body = rng.choice(TARGETS)
+    path = path.format(**ids)
+    body = {key: value.format(**ids) if isinstance(value, str) else value for key, value in body.items()}
+    fmt = rng.choice(list(CONTENT_TYPES))
+    mutation = rng.choice(mutations)
+    data = MUTATIONS[mutation](rng, body, fmt, ROOTS[path.rstrip("/").split("/")[-1]])
+    return {"case": n, "path": path, "format": fmt, "mutation": mutation, "body": data}
+
+
+def send(case):
+    headers = {"Content-Type": CONTENT_TYPES[case["format"]], "Accept": "application/json"}
+    start = time.perf_counter()
+    try:
+        response = client.post(case["path"], data=case["body"], headers=headers)
+        outcome = f"{response.status_code // 100}xx"
+        status = response.status_code
+    except requests.Timeout:
+        outcome, status = "timeout", None
+    except requests.RequestException:
+        outcome, status = "connection", None
+    elapsed = time.perf_counter() - start
+    # bodies can be megabytes, only the corpus needs them and save() rebuilds them
+    return {key: value for key, value in case.items() if key != "body"} | {
+        "outcome": outcome, "status": status, "elapsed": elapsed, "size": len(case["body"])}
+
+
+def save(corpus, result, body, seed, mutations):
+    # the raw body plus what is needed to send it again
+    name = f"{result['outcome']}-{result['mutation']}-{seed}-{result['case']}"
+    with open(os.path.join(corpus, name + ".body"), "wb") as f:
+        f.write(body)
+    meta = dict(result)
+    meta.update(seed=seed, mutations=mutations, method="POST", content_type=CONTENT_TYPES[result["format"]],
+                elapsed_ms=round(result["elapsed"] * 1000, 3))
+    write_json(os.path.join(corpus, name + ".json"), meta)
+
+
+def parents():
+    # the entities the relationship routes and link bodies point at
+    return {
+        "todo": client.post("/todos", json=TARGETS[0][1]).json()["id"],
+        "project": client.post("/projects", json=TARGETS[1][1]).json()["id"],
+        "category": client.post("/categories", json=TARGETS[2][1]).json()["id"],
+    }
+
+
+def replay(corpus):
+    rows = []
+    ids = parents()
+    for meta_path in sorted(glob.glob(os.path.join(corpus, "*.json"))):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        result = send(make_case(meta["seed"], meta["case"], ids, meta["mutations"]))
+        rows.append({"entry": os.path.basename(meta_path)[:-len(".json")], "recorded": meta["outcome"],
+                     "now": result["outcome"], "status": result["status"],
+                     "ms": round(result["elapsed"] * 1000, 1)})
+    print_table(rows, ["entry", "recorded", "now", "status", "ms"])
+    return 1 if any(row["now"] not in ("2xx", "4xx") for row in rows) else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="fuzz the POST routes with malformed json and xml bodies")
+    parser.add_argument("--count", type=int, default=2000, help="number of cases")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=None, help="(default: random, printed)")
+    parser.add_argument("--case", type=int, help="only send this case of --seed")
+    parser.add_argument("--mutations", default=",".join(MUTATIONS))
+    parser.add_argument("--timeout", type=float, default=10, help="seconds before a request counts as a timeout")
+    parser.add_argument("--outlier-factor", type=float, default=20, help="slower than this many times the p50 is an outlier")
+    parser.add_argument("--outlier-min-ms", type=float, default=100, help="but never faster than this")
+    parser.add_argument("--corpus", metavar="DIR", default="fuzz-corpus", help="where interesting cases are written")
+    parser.add_argument("--replay", action="store_true", help="send every case in --corpus again")
+    parser.add_argument("--json", metavar="PATH", help="write the counts as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, timeout=args.timeout, pool_size=max(client.POOL_SIZE, args.threads))
+
+    seed = args.seed if args.seed is not None else random.randrange(2 ** 31)
+    mutations = args.mutations.split(",")
+    for mutation in mutations:
+        if mutation not in MUTATIONS:
+            raise SystemExit(f"unknown mutation {mutation}, expected one of {', '.join(MUTATIONS)}")
+    print(f"seed {seed}", file=sys.stderr)
+
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    try:
+        if args.replay:
+            return replay(args.corpus)
+        ids = parents()
+        numbers = [args.case] if args.case is not None else range(args.count)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as pool:
+            results = list(pool.map(lambda n: send(make_case(seed, n, ids, mutations)), numbers))
+        elapsed = time.perf_counter() - start
+    finally:
+        client.remove_listener(registry)
+        registry.teardown(args.threads)
+
+    latencies = Histogram.of(r["elapsed"] for r in results if r["status"] is not None)
+    threshold = max(args.outlier_factor * latencies.percentile(50), args.outlier_min_ms / 1000)
+    interesting = []
+    for result in results:
+        if result["outcome"] in ("5xx", "timeout", "connection"):
+            interesting.append(result)
+        elif result["elapsed"] > threshold:
+            interesting.append(dict(result, outcome="slow"))
+    if interesting:
+        os.makedirs(args.corpus, exist_ok=True)
+        for result in interesting:
+            save(args.corpus, result, make_case(seed, result["case"], ids, mutations)["body"], seed, mutations)
+
+    counts = Counter((r["mutation"], r["outcome"]) for r in results)
+    outcomes = sorted({outcome for _, outcome in counts} | {"slow"})
+    slow = Counter(r["mutation"] for r in interesting if r["outcome"] == "slow")
+    rows = []
+    for mutation in mutations:
+        row = {"mutation": mutation}
+        for outcome in outcomes:
+            row[outcome] = slow[mutation] if outcome == "slow" else counts[(mutation, outcome)]
+        rows.append(row)
+    print_table(rows, ["mutation", *outcomes])
+    print(f"\n{len(results)} cases in {elapsed:.1f}s ({len(results) / elapsed:.0f}/s), "
+          f"{len(interesting)} written to {args.corpus}")
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "seed": seed, "count": len(results),
+                               "outlier_ms": round(threshold * 1000, 3), "outcomes": rows})
+    return 1 if any(r["outcome"] != "slow" for r in interesting) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import requests
+
+from common import client
+from common.cleanup import CleanupRegistry
+from perf.stats import print_table, write_json
+
+# concurrent id-generation race detector
+#
+# the session notes show ids handed out as "next available" (projects 1.03,
+# todos 1.10). this fires thousands of concurrent creates at each create route
+# and checks that the ids are unique, increase in the order the requests were
+# served and that every created entity can be read back (no lost writes).
+#
+# usage (from PART_A): python -m perf.id_race --count 2000 --threads 16
+#
+# --processes spreads the threads over several processes, which only makes
+# sense against a server shared by all of them (the http backend).
+
+# target name -> (create route, kind of the created entity)
+TARGETS = {
+    "todos": ("/todos", "todos"),
+    "projects": ("/projects", "projects"),
+    "categories": ("/categories", "categories"),
+    "todo-categories": ("/todos/{todo}/categories", "categories"),
+    "project-tasks": ("/projects/{project}/tasks", "todos"),
+}
+BODY = {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce"}
+
+
+def fire(route, count, threads, settings=None):
+    # returns (worker, id or None, status, start, end) for every create
+    if settings:
+        client.configure(**settings)
+
+    def create(_):
+        worker = f"{os.getpid()}-{threading.get_ident()}"
+        start = time.perf_counter()
+        try:
+            response = client.post(route, json=BODY)
+            status = response.status_code
+            entity_id = response.json().get("id") if status == 201 else None
+        except (requests.RequestException, ValueError):
+            status, entity_id = None, None
+        return worker, entity_id, status, start, time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(create, range(count)))
+
+
+def check(records, listed, related):
+    # records of one target, listed/related the ids read back afterwards
+    created = [r for r in records if r[1] is not None]
+    ids = [int(r[1]) for r in created]
+
+    duplicates = [i for i, n in Counter(ids).items() if n > 1]
+
+    # each worker sends one request at a time, so its ids must increase
+    by_worker = defaultdict(list)
+    for worker, entity_id, _, start, _ in created:
+        by_worker[worker].append((start, int(entity_id)))
+    worker_violations = 0
+    for values in by_worker.values():
+        values.sort()
+        worker_violations += sum(b[1] <= a[1] for a, b in zip(values, values[1:]))
+
+    # a create that finished before another started must have a lower id
+    by_end = sorted(created, key=lambda r: r[4])
+    order_violations = 0
+    highest = -1
+    position = 0
+    for record in sorted(created, key=lambda r: r[3]):
+        while position < len(by_end) and by_end[position][4] < record[3]:
+            highest = max(highest, int(by_end[position][1]))
+            position += 1
+        order_violations += int(record[1]) <= highest
+
+    lost = [i for i in map(str, ids) if i not in listed]
+    unlinked = [i for i in map(str, ids) if related is not None and i not in related]
+    return {
+        "creates": len(records),
+        "errors": len(records) - len(created),
+        "duplicates": len(duplicates),
+        "worker_order_violations": worker_violations,
+        "order_violations": order_violations,
+        "lost_writes": len(lost),
+        "unlinked": len(unlinked),
+    }
+
+
+def listed_ids(path, key):
+    response = client.get(path)
+    assert response.status_code == 200, f"GET {path} failed"
+    return {str(entity["id"]) for entity in response.json().get(key, [])}
+
+
+def run_target(name, parents, args):
+    route, kind = TARGETS[name]
+    route = route.format(**parents)
+    start = time.perf_counter()
+    if args.processes > 1:
+        settings = {"base_url": client.API_URL, "backend": client.BACKEND, "pool_size": args.threads}
+        per_process = -(-args.count // args.processes)
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=args.processes, mp_context=context) as pool:
+            futures = [
+                pool.submit(fire, route, per_process, args.threads, settings)
+                for _ in range(args.processes)
+            ]
+            records = [record for future in futures for record in future.result()]
+    else:
+        records = fire(route, args.count, args.threads)
+    elapsed = time.perf_counter() - start
+
+    related = listed_ids(route, kind) if route.count("/") > 1 else None
+    result = check(records, listed_ids(f"/{kind}", kind), related)
+    result["target"] = name
+    result["throughput_rps"] = round(len(records) / elapsed, 1) if elapsed else 0.0
+    return result, [(kind, str(r[1])) for r in records if r[1] is not None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="concurrent id generation race detector")
+    parser.add_argument("--count", type=int, default=2000, help="creates per target")
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=1)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--json", metavar="PATH", help="write the results as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.threads))
+    # every process would race against a fake server of its own
+    if args.processes > 1 and client.BACKEND != "http":
+        parser.error("--processes above 1 needs the http backend")
+
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    rows = []
+    try:
+        parents = {
+            "todo": client.post("/todos", json=BODY).json()["id"],
+            "project": client.post("/projects", json=BODY).json()["id"],
+        }
+        for name in args.targets.split(","):
+            result, created = run_target(name, parents, args)
+            # creates from other processes are not seen by the registry
+            for kind, entity_id in created:
+                registry.add(kind, entity_id)
+            rows.append(result)
+    finally:
+        client.remove_listener(registry)
+        registry.teardown(args.threads)
+
+    print_table(rows, ["target", "creates", "errors", "duplicates", "worker_order_violations",
+                       "order_violations", "lost_writes", "unlinked", "throughput_rps"])
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "threads": args.threads,
+                               "processes": args.processes, "targets": rows})
+    problems = ("errors", "duplicates", "worker_order_violations", "order_violations", "lost_writes", "unlinked")
+    return 1 if any(row[p] for row in rows for p in problems) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,234 @@
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from common.histogram import Histogram
+from perf.stats import print_table, summarize, write_json
+
+# open-loop load generator
+#
+# requests are issued on a poisson arrival schedule at a target rate, whether
+# or not earlier requests have completed, so queueing delay under load is not
+# hidden the way it is in closed-loop scripts like random_test.py. latency is
+# measured from the intended send time (coordinated-omission corrected) as
+# well as from the actual send time.
+#
+# usage (from PART_A): python -m perf.load --rates 20,50,100,200 --duration 10
+
+TODO = {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce"}
+UPDATE = {"title": "Updated Title", "description": "Updated description"}
+
+
+class Entities:
+    # ids the operations work on, shared by all in-flight requests
+
+    def __init__(self, rng):
+        self.lock = threading.Lock()
+        self.rng = rng
+        self.todos = []
+        self.category = None
+        self.project = None
+
+    def add(self, todo_id):
+        with self.lock:
+            self.todos.append(todo_id)
+
+    def pick(self):
+        with self.lock:
+            return self.rng.choice(self.todos) if self.todos else None
+
+    def take(self):
+        with self.lock:
+            if len(self.todos) <= 1:
+                return None
+            return self.todos.pop(self.rng.randrange(len(self.todos)))
+
+    def live(self, todo_id):
+        with self.lock:
+            return todo_id in self.todos
+
+
+#### OPERATIONS ####
+# each sends one request and returns its status, "stale" for a 404 on a todo
+# that a delete in flight took after it was picked, or None if it had nothing to do
+
+
+def create_todo(entities):
+    response = client.post("/todos", json=TODO)
+    if response.status_code == 201:
+        entities.add(response.json()["id"])
+    return response.status_code
+
+
+def _on_picked(entities, send):
+    todo_id = entities.pick()
+    if todo_id is None:
+        return None
+    status = send(todo_id).status_code
+    return "stale" if status == 404 and not entities.live(todo_id) else status
+
+
+def get_todo(entities):
+    return _on_picked(entities, lambda todo_id: client.get(f"/todos/{todo_id}"))
+
+
+def update_todo(entities):
+    return _on_picked(entities, lambda todo_id: client.put(f"/todos/{todo_id}", json=UPDATE))
+
+
+def delete_todo(entities):
+    todo_id = entities.take()
+    return todo_id and client.delete(f"/todos/{todo_id}").status_code
+
+
+def link_category(entities):
+    return _on_picked(entities, lambda todo_id: client.post(f"/todos/{todo_id}/categories",
+                                                            json={"id": entities.category}))
+
+
+def add_project_task(entities):
+    response = client.post(f"/projects/{entities.project}/tasks", json=TODO)
+    if response.status_code == 201:
+        entities.add(response.json()["id"])
+    return response.status_code
+
+
+OPERATIONS = {
+    "create_todo": create_todo,
+    "get_todo": get_todo,
+    "update_todo": update_todo,
+    "delete_todo": delete_todo,
+    "link_category": link_category,
+    "add_project_task": add_project_task,
+}
+DEFAULT_MIX = "create_todo=2,get_todo=4,update_todo=2,delete_todo=1,link_category=1,add_project_task=1"
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in OPERATIONS:
+            raise SystemExit(f"unknown operation {name}, expected one of {', '.join(OPERATIONS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def run_step(rate, duration, mix, entities, workers, rng, max_backlog):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    lock = threading.Lock()
+    corrected = Histogram()
+    service = Histogram()
+    counts = {"sent": 0, "errors": 0, "stale": 0, "in_flight": 0}
+
+    def execute(name, intended):
+        sent = time.perf_counter()
+        try:
+            status = OPERATIONS[name](entities)
+            ok = status in (None, "stale") or status < 400
+        except requests.RequestException:
+            status, ok = None, False
+        done = time.perf_counter()
+        with lock:
+            counts["in_flight"] -= 1
+            corrected.record(done - intended)
+            service.record(done - sent)
+            counts["errors"] += not ok
+            counts["stale"] += status == "stale"
+
+    saturated = False
+    start = time.perf_counter()
+    intended = start
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            intended += rng.expovariate(rate)
+            if intended - start >= duration:
+                break
+            delay = intended - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            with lock:
+                # past this backlog the server cannot keep up with the rate
+                if counts["in_flight"] >= max_backlog:
+                    saturated = True
+                    break
+                counts["in_flight"] += 1
+                counts["sent"] += 1
+            name = rng.choices(names, weights)[0]
+            pool.submit(execute, name, intended)
+    elapsed = time.perf_counter() - start
+
+    latency = summarize(corrected, counts["errors"], elapsed)
+    uncorrected = summarize(service)
+    return {
+        "offered_rps": rate,
+        "achieved_rps": latency["throughput_rps"],
+        "sent": counts["sent"],
+        "errors": counts["errors"],
+        "stale": counts["stale"],
+        "p50_ms": latency["p50_ms"],
+        "p95_ms": latency["p95_ms"],
+        "p99_ms": latency["p99_ms"],
+        "max_ms": latency["max_ms"],
+        "service_p99_ms": uncorrected["p99_ms"],
+        "saturated": saturated,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="open-loop poisson load generator")
+    parser.add_argument("--rates", default="10,25,50,100,200", help="target arrivals per second, one step each")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per step")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="operation=weight pairs")
+    parser.add_argument("--workers", type=int, default=64, help="maximum requests in flight")
+    parser.add_argument("--max-backlog", type=int, default=0, help="stop a step at this many queued requests (default 10x workers)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="write the results as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.workers))
+    resources.start(args.monitor)
+
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    entities = Entities(random.Random(args.seed))
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    rows = []
+    try:
+        entities.category = client.post("/categories", json={"title": "load"}).json()["id"]
+        entities.project = client.post("/projects", json={"title": "load"}).json()["id"]
+        for _ in range(10):
+            create_todo(entities)
+        for rate in (float(r) for r in args.rates.split(",")):
+            row = run_step(rate, args.duration, mix, entities, args.workers, rng, args.max_backlog or 10 * args.workers)
+            rows.append(row)
+            print(f"offered {rate}/s: achieved {row['achieved_rps']}/s, p99 {row['p99_ms']}ms", file=sys.stderr)
+            if row["saturated"]:
+                break
+    finally:
+        usage = resources.stop()
+        client.remove_listener(registry)
+        registry.teardown()
+
+    print_table(rows, ["offered_rps", "achieved_rps", "sent", "errors", "stale", "p50_ms", "p95_ms",
+                       "p99_ms", "max_ms", "service_p99_ms", "saturated"])
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "mix": mix, "duration": args.duration,
+                               "steps": rows, "resources": usage})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
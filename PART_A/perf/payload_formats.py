@@ -0,0 +1,147 @@
+import argparse
+import json
+import sys
+import time
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import escape
+
+import requests
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from common.histogram import Histogram
+from perf.stats import print_table, summarize, write_json
+
+# json versus xml payload benchmark
+#
+# test_payloads.py shows the api takes xml bodies as well as json. this sends
+# the same todos and categories as json and as xml, asks for the response in
+# each format with the Accept header, and reports the latency, body bytes and
+# client-side parse time of every combination for growing description sizes.
+#
+# usage (from PART_A): python -m perf.payload_formats --sizes 16,1024,65536 --iterations 100
+
+FORMATS = {"json": "application/json", "xml": "application/xml"}
+
+
+def entity(size, n):
+    return {"title": f"payload {n}", "description": ("lorem ipsum " * (size // 12 + 1))[:size]}
+
+
+def encode(data, root, fmt):
+    if fmt == "json":
+        return json.dumps(data).encode()
+    fields = "".join(f"<{key}>{escape(str(value))}</{key}>" for key, value in data.items())
+    return f"<{root}>{fields}</{root}>".encode()
+
+
+def parse(content, fmt):
+    if fmt == "json":
+        return json.loads(content)
+    root = ET.fromstring(content)
+    return {child.tag: child.text for child in root}
+
+
+# (name, method, path, body root element or None for no body, expected status)
+OPERATIONS = [
+    ("create todo", "POST", "/todos", "todo", 201),
+    ("create category", "POST", "/todos/{todo}/categories", "category", 201),
+    ("get todo", "GET", "/todos/{sized}", None, 200),
+]
+
+
+def run_combination(operation, size, request_format, response_format, ids, iterations, registry):
+    name, method, path, root, expected = operation
+    latencies = Histogram()
+    parse_times = Histogram()
+    errors = 0
+    request_bytes = 0
+    response_bytes = 0
+    headers = {"Accept": FORMATS[response_format]}
+    if root:
+        headers["Content-Type"] = FORMATS[request_format]
+    for n in range(iterations):
+        body = encode(entity(size, n), root, request_format) if root else None
+        start = time.perf_counter()
+        try:
+            response = client.request(method, path.format(**ids), data=body, headers=headers)
+        except requests.RequestException:
+            errors += 1
+            continue
+        latencies.record(time.perf_counter() - start)
+        start = time.perf_counter()
+        try:
+            data = parse(response.content, response_format)
+        except (ValueError, ET.ParseError):
+            errors += 1
+            continue
+        parse_times.record(time.perf_counter() - start)
+        errors += response.status_code != expected
+        request_bytes = len(body or b"")
+        response_bytes = len(response.content)
+        if root and response.status_code == 201:
+            # xml responses are not seen by the client's created-entity tracking
+            registry.add("todos" if root == "todo" else "categories", str(data["id"]))
+    result = summarize(latencies, errors)
+    return {
+        "operation": name,
+        "size": size,
+        "request": request_format if root else "-",
+        "response": response_format,
+        "count": result["count"],
+        "errors": errors,
+        "p50_ms": result["p50_ms"],
+        "p99_ms": result["p99_ms"],
+        "request_bytes": request_bytes,
+        "response_bytes": response_bytes,
+        "parse_p50_us": round(parse_times.percentile(50) * 1000000, 1),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="json versus xml request and response bodies")
+    parser.add_argument("--sizes", default="16,256,4096,65536", help="description lengths in characters")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--json", metavar="PATH", help="write the results as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend)
+    resources.start(args.monitor)
+
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    rows = []
+    try:
+        ids = {}
+        for size in (int(s) for s in args.sizes.split(",")):
+            # the todo read back carries a description of this size
+            ids["sized"] = client.post("/todos", json=entity(size, 0)).json()["id"]
+            for operation in OPERATIONS:
+                request_formats = FORMATS if operation[3] else ["json"]
+                for request_format in request_formats:
+                    for response_format in FORMATS:
+                        # every combination links to a todo of its own, so none is
+                        # timed on a todo still carrying earlier combinations' links
+                        if "{todo}" in operation[2]:
+                            ids["todo"] = client.post("/todos", json=entity(16, 0)).json()["id"]
+                        rows.append(run_combination(operation, size, request_format, response_format,
+                                                    ids, args.iterations, registry))
+            print(f"size {size} done", file=sys.stderr)
+    finally:
+        usage = resources.stop()
+        client.remove_listener(registry)
+        registry.teardown()
+
+    print_table(rows, ["operation", "size", "request", "response", "count", "errors", "p50_ms", "p99_ms",
+                       "request_bytes", "response_bytes", "parse_p50_us"])
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "iterations": args.iterations, "results": rows,
+                               "resources": usage})
+    return 1 if any(row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+import argparse
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client
+from perf.stats import print_table, write_json
+from perf.workload import GENERATORS
+
+# bulk seeding of a todo/project/category graph
+#
+# creates the todos, projects and categories with lorem ipsum titles and
+# descriptions from a bounded thread pool over the pooled connections, then
+# links every todo to projects (tasksof) and categories at the given density.
+# the entities stay on the server; --ids writes their ids and links so later
+# runs can find them.
+#
+# usage (from PART_A): python -m perf.populate --todos 10000 --projects 500 --categories 100 --density 1.5 --ids ids.json
+
+COLLECTIONS = [("todos", "todo"), ("projects", "project"), ("categories", "category")]
+# what a todo links to: relationship -> collection of the targets
+LINKS = {"tasksof": "projects", "categories": "categories"}
+
+
+def _post(job):
+    path, body = job
+    try:
+        response = client.post(path, json=body)
+    except requests.RequestException:
+        return None
+    if response.status_code != 201:
+        return None
+    # link requests answer 201 without a body
+    return str(response.json()["id"]) if response.content else body["id"]
+
+
+def phase(name, jobs, workers):
+    # run the (path, body) posts concurrently, returns (results, report row)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_post, jobs))
+    elapsed = time.perf_counter() - start
+    errors = results.count(None)
+    print(f"{name}: {len(jobs) - errors} in {elapsed:.1f}s", file=sys.stderr)
+    return results, {
+        "phase": name,
+        "requests": len(jobs),
+        "errors": errors,
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(len(jobs) / elapsed, 1) if elapsed else 0.0,
+    }
+
+
+def plan_links(rng, todos, ids, density):
+    # every todo gets density links on average, each to a project or a category
+    jobs = []
+    links = []
+    for todo in todos:
+        count = int(density) + (rng.random() < density % 1)
+        targets = set()
+        for _ in range(count):
+            relationship = rng.choice(list(LINKS))
+            if ids[LINKS[relationship]]:
+                targets.add((relationship, rng.choice(ids[LINKS[relationship]])))
+        for relationship, target in sorted(targets):
+            jobs.append((f"/todos/{todo}/{relationship}", {"id": target}))
+            links.append([todo, relationship, target])
+    return jobs, links
+
+
+def populate(counts, density, workers, rng):
+    # returns ({collection: ids}, [[todo, relationship, target], ...], report rows)
+    ids = {}
+    rows = []
+    for collection, kind in COLLECTIONS:
+        jobs = [(f"/{collection}", GENERATORS[kind](rng, {})) for _ in range(counts[collection])]
+        results, row = phase(collection, jobs, workers)
+        ids[collection] = [i for i in results if i is not None]
+        rows.append(row)
+    jobs, links = plan_links(rng, ids["todos"], ids, density)
+    results, row = phase("links", jobs, workers)
+    rows.append(row)
+    links = [link for link, result in zip(links, results) if result is not None]
+    return ids, links, rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="seed the server with a graph of todos, projects and categories")
+    parser.add_argument("--todos", type=int, default=1000)
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--density", type=float, default=1.0, help="average links per todo to projects and categories")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent requests")
+    parser.add_argument("--seed", type=int, default=None, help="same seed, same titles and links")
+    parser.add_argument("--ids", metavar="PATH", help="write the created ids and links as json to PATH")
+    parser.add_argument("--json", metavar="PATH", help="write the throughput report as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.workers))
+
+    counts = {"todos": args.todos, "projects": args.projects, "categories": args.categories}
+    start = time.perf_counter()
+    ids, links, rows = populate(counts, args.density, args.workers, random.Random(args.seed))
+    elapsed = time.perf_counter() - start
+    requests_sent = sum(row["requests"] for row in rows)
+    rows.append({
+        "phase": "total",
+        "requests": requests_sent,
+        "errors": sum(row["errors"] for row in rows),
+        "seconds": round(elapsed, 2),
+        "throughput_rps": round(requests_sent / elapsed, 1) if elapsed else 0.0,
+    })
+
+    print_table(rows, ["phase", "requests", "errors", "seconds", "throughput_rps"])
+    if args.ids:
+        write_json(args.ids, {"api_url": client.API_URL, "seed": args.seed, **ids, "links": links})
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "workers": args.workers, "density": args.density,
+                               "phases": rows})
+    return 1 if rows[-1]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+import argparse
+import random
+import sys
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from perf.stats import print_table, write_json
+from perf.workload import PROFILES, Pools, default_workload, load_workload, run, seed, with_read_share
+
+# adaptive concurrency ramp
+#
+# runs a workload mix with one client, then more and more concurrent clients,
+# until the p99 latency goes over the slo or too many requests fail. the best
+# throughput of the steps that stayed within the limits is the maximum
+# sustainable rate of the server, and the knee is the step after which more
+# clients mostly add queueing instead of throughput.
+#
+# usage (from PART_A): python -m perf.ramp --mix crud --slo-p99-ms 50 --max-error-rate 0.01
+
+# which operations of the suite mix each --mix keeps
+MIXES = {
+    "suites": lambda operation: True,
+    # plain create/read/update/delete of todos, projects and categories
+    "crud": lambda operation: operation["path"].count("/") <= 2,
+    # the relationship routes (categories, tasks, tasksof)
+    "links": lambda operation: operation["path"].count("/") > 2,
+}
+
+
+def knee(rows):
+    # the step furthest above the straight line from the first to the last
+    # step of the throughput curve (kneedle on the normalized curve)
+    if len(rows) < 3:
+        return rows[-1] if rows else None
+    xs = [row["concurrency"] for row in rows]
+    ys = [row["throughput_rps"] for row in rows]
+    x_span = (xs[-1] - xs[0]) or 1
+    y_span = (max(ys) - min(ys)) or 1
+    distance = [(y - min(ys)) / y_span - (x - xs[0]) / x_span for x, y in zip(xs, ys)]
+    return rows[distance.index(max(distance))]
+
+
+def ramp(workload, levels, duration, pools, rng, slo_p99_ms, max_error_rate):
+    rows = []
+    for concurrency in levels:
+        total = run(workload, concurrency, duration, pools, rng)[-1]
+        error_rate = total["errors"] / total["count"] if total["count"] else 1.0
+        within = total["p99_ms"] <= slo_p99_ms and error_rate <= max_error_rate
+        row = {
+            "concurrency": concurrency,
+            "throughput_rps": total["throughput_rps"],
+            "p50_ms": total["p50_ms"],
+            "p99_ms": total["p99_ms"],
+            "error_rate": round(error_rate, 4),
+            "within_slo": within,
+        }
+        rows.append(row)
+        print(f"concurrency {concurrency}: {row['throughput_rps']} requests/s, p99 {row['p99_ms']}ms, "
+              f"errors {row['error_rate']:.2%}", file=sys.stderr)
+        if not within:
+            break
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ramp concurrency until the latency slo or error threshold breaks")
+    parser.add_argument("--mix", choices=MIXES, default="suites", help="part of the suite mix to run")
+    parser.add_argument("--workload", metavar="PATH", help="json workload definition instead of --mix")
+    parser.add_argument("--profile", choices=PROFILES, default="suites", help="rescale the mix to a read share")
+    parser.add_argument("--slo-p99-ms", type=float, default=100, help="p99 latency limit per step")
+    parser.add_argument("--max-error-rate", type=float, default=0.01, help="failed request share limit per step")
+    parser.add_argument("--start", type=int, default=1, help="concurrency of the first step")
+    parser.add_argument("--factor", type=float, default=2, help="multiply the concurrency by this each step")
+    parser.add_argument("--max-concurrency", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=10, help="seconds per step")
+    parser.add_argument("--entities", type=int, default=20, help="todos, projects and categories created up front")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="write the curve as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+    if args.start < 1 or args.start > args.max_concurrency:
+        parser.error("--start must be between 1 and --max-concurrency")
+
+    if args.workload:
+        workload = load_workload(args.workload)
+    else:
+        workload = default_workload()
+        operations = [o for o in workload["operations"] if MIXES[args.mix](o)]
+        workload = dict(workload, name=args.mix, operations=operations)
+    if PROFILES[args.profile] is not None:
+        workload = with_read_share(workload, PROFILES[args.profile])
+
+    levels = []
+    concurrency = args.start
+    while concurrency <= args.max_concurrency:
+        levels.append(concurrency)
+        concurrency = max(concurrency + 1, int(concurrency * args.factor))
+
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.max_concurrency))
+    resources.start(args.monitor)
+    rng = random.Random(args.seed)
+    pools = Pools(random.Random(args.seed))
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    try:
+        seed(pools, args.entities, rng)
+        rows = ramp(workload, levels, args.duration, pools, rng, args.slo_p99_ms, args.max_error_rate)
+    finally:
+        usage = resources.stop()
+        client.remove_listener(registry)
+        registry.teardown(args.max_concurrency)
+
+    print_table(rows, ["concurrency", "throughput_rps", "p50_ms", "p99_ms", "error_rate", "within_slo"])
+    sustainable = [row for row in rows if row["within_slo"]]
+    best = max(sustainable, key=lambda row: row["throughput_rps"]) if sustainable else None
+    bend = knee(sustainable)
+    if best:
+        print(f"\nmax sustainable throughput: {best['throughput_rps']} requests/s at concurrency {best['concurrency']}")
+        print(f"knee: concurrency {bend['concurrency']} ({bend['throughput_rps']} requests/s, p99 {bend['p99_ms']}ms)")
+    else:
+        print("\neven one client breaks the slo")
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {
+            "api_url": client.API_URL,
+            "workload": workload,
+            "slo_p99_ms": args.slo_p99_ms,
+            "max_error_rate": args.max_error_rate,
+            "steps": rows,
+            "max_sustainable_rps": best["throughput_rps"] if best else 0.0,
+            "max_sustainable_concurrency": best["concurrency"] if best else 0,
+            "knee_concurrency": bend["concurrency"] if bend else 0,
+            "resources": usage,
+        })
+    return 0 if best else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
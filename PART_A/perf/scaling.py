@@ -0,0 +1,132 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from common.histogram import Histogram
+from perf.stats import print_table, summarize, write_json
+
+# scalability sweep of the listing routes
+#
+# the api has no pagination, so GET /todos returns the whole collection. this
+# grows each collection to every size of the sweep and records the listing
+# latency, response bytes and client-side json parse time at each size.
+#
+# usage (from PART_A): python -m perf.scaling --sizes 100,1000,10000 --kinds todos
+
+BODIES = {
+    "todos": {"title": "cing elit, sed do ei", "description": "nulla pariatur. Exce"},
+    "projects": {"title": "sed do eiusmod tempo", "description": "si ut aliquip ex eaa"},
+    "categories": {"title": ", quis nostrud exerc", "description": "iusmod tempor incidi"},
+}
+
+
+def grow(kind, count, workers):
+    # create count entities concurrently, returns how many failed
+    def create(_):
+        try:
+            return client.post(f"/{kind}", json=BODIES[kind]).status_code == 201
+        except requests.RequestException:
+            return False
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return sum(not ok for ok in pool.map(create, range(count)))
+
+
+def measure(kind, samples):
+    latencies = Histogram()
+    parse_times = Histogram()
+    size_bytes = 0
+    entities = 0
+    errors = 0
+    for _ in range(samples):
+        start = time.perf_counter()
+        try:
+            response = client.get(f"/{kind}")
+        except requests.RequestException:
+            errors += 1
+            continue
+        latencies.record(time.perf_counter() - start)
+        if response.status_code != 200:
+            errors += 1
+            continue
+        start = time.perf_counter()
+        data = json.loads(response.content)
+        parse_times.record(time.perf_counter() - start)
+        size_bytes = len(response.content)
+        entities = len(data.get(kind, []))
+    result = summarize(latencies, errors)
+    parse = summarize(parse_times)
+    return {
+        "entities": entities,
+        "bytes": size_bytes,
+        "p50_ms": result["p50_ms"],
+        "p95_ms": result["p95_ms"],
+        "max_ms": result["max_ms"],
+        "parse_p50_ms": parse["p50_ms"],
+        "errors": errors,
+    }
+
+
+def sweep(kind, sizes, samples, workers, max_latency_ms):
+    rows = []
+    response = client.get(f"/{kind}")
+    current = len(response.json().get(kind, []))
+    for size in sorted(sizes):
+        start = time.perf_counter()
+        failed = grow(kind, max(0, size - current), workers)
+        seed_seconds = time.perf_counter() - start
+        current = max(current, size) - failed
+        row = dict(kind=kind, size=size, seed_s=round(seed_seconds, 2), seed_errors=failed, **measure(kind, samples))
+        rows.append(row)
+        print(f"{kind} at {size}: p50 {row['p50_ms']}ms, {row['bytes']} bytes", file=sys.stderr)
+        # past this point the api has fallen over for our purposes
+        if row["errors"] or (max_latency_ms and row["p50_ms"] > max_latency_ms):
+            break
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="listing latency versus collection size")
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--kinds", default="todos,projects,categories")
+    parser.add_argument("--samples", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent creates while seeding")
+    parser.add_argument("--max-latency-ms", type=float, default=0, help="stop a sweep once p50 exceeds this")
+    parser.add_argument("--keep", action="store_true", help="leave the seeded entities on the server")
+    parser.add_argument("--json", metavar="PATH", help="write the curve as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.workers))
+    resources.start(args.monitor)
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    rows = []
+    try:
+        for kind in args.kinds.split(","):
+            rows += sweep(kind, sizes, args.samples, args.workers, args.max_latency_ms)
+    finally:
+        usage = resources.stop()
+        client.remove_listener(registry)
+        if not args.keep:
+            registry.teardown(args.workers)
+
+    print_table(rows, ["kind", "size", "entities", "bytes", "p50_ms", "p95_ms", "max_ms", "parse_p50_ms", "errors", "seed_s"])
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "backend": client.BACKEND, "curve": rows,
+                               "resources": usage})
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,191 @@
+import argparse
+import math
+import random
+import sys
+import time
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from perf.stats import print_table, write_json
+from perf.workload import Pools, load_workload, run, seed
+
+# soak test with drift detection
+#
+# cycles the documented create/read/update/delete/link operations for a long
+# time with creates and deletes in balance, and every interval records the
+# request latency, the server's memory and the size of each collection. the
+# entities the server holds beyond those still alive in the run are counted
+# as leaked. at the end a least-squares trend is fitted to every series and a
+# series whose slope is significant (and large enough to matter) is flagged.
+#
+# usage (from PART_A): python -m perf.soak --minutes 240 --interval 60 --json soak.json
+
+# every create has a matching delete so the collections stay about the same size
+SOAK_WORKLOAD = {
+    "name": "soak",
+    "operations": [
+        {"method": "POST", "path": "/todos", "body": "todo", "creates": "todo", "weight": 2},
+        {"method": "GET", "path": "/todos/{todo}", "weight": 4},
+        {"method": "PUT", "path": "/todos/{todo}", "body": "update", "weight": 2},
+        {"method": "DELETE", "path": "/todos/{todo}", "consumes": "todo", "weight": 3},
+        {"method": "POST", "path": "/todos/{todo}/categories", "body": "link_category", "uses": ["category"],
+         "links": "todo_category", "weight": 1},
+        {"method": "GET", "path": "/todos/{todo}/categories", "weight": 1},
+        {"method": "DELETE", "path": "/todos/{todo}/categories/{category}", "consumes": "todo_category", "weight": 1},
+        {"method": "POST", "path": "/projects", "body": "project", "creates": "project", "weight": 1},
+        {"method": "GET", "path": "/projects/{project}", "weight": 1},
+        {"method": "POST", "path": "/projects/{project}/tasks", "body": "todo", "creates": "todo",
+         "links": "todo_project", "weight": 1},
+        {"method": "GET", "path": "/projects/{project}/tasks", "weight": 1},
+        {"method": "DELETE", "path": "/projects/{project}", "consumes": "project", "weight": 1},
+        {"method": "GET", "path": "/todos", "weight": 1},
+    ],
+}
+COLLECTIONS = {"todos": "todo", "projects": "project", "categories": "category"}
+
+# series checked for drift: (sample key, smallest change over the run that matters,
+# as a share of the mean, and as an absolute value)
+SERIES = [
+    ("p50_ms", 0.1, 0.0),
+    ("p99_ms", 0.1, 0.0),
+    ("rss_mb", 0.1, 0.0),
+    ("todos", 0.1, 1),
+    ("projects", 0.1, 1),
+    ("categories", 0.1, 1),
+    ("leaked", 0.0, 1),
+]
+# one-sided t for p < 0.01 by degrees of freedom (samples - 2), between two
+# listed values the smaller one's is used. from 121 on it is about the normal 2.33
+T_CRITICAL = {
+    1: 31.82, 2: 6.96, 3: 4.54, 4: 3.75, 5: 3.36, 6: 3.14, 7: 3.00, 8: 2.90, 9: 2.82, 10: 2.76,
+    11: 2.72, 12: 2.68, 13: 2.65, 14: 2.62, 15: 2.60, 16: 2.58, 17: 2.57, 18: 2.55, 19: 2.54, 20: 2.53,
+    21: 2.52, 22: 2.51, 23: 2.50, 24: 2.49, 25: 2.49, 26: 2.48, 27: 2.47, 28: 2.47, 29: 2.46, 30: 2.46,
+    40: 2.42, 60: 2.39, 120: 2.36, 121: 2.33,
+}
+
+
+def collection_sizes():
+    return {kind: len(client.get(f"/{kind}").json().get(kind, [])) for kind in COLLECTIONS}
+
+
+def rebalance(pools, target):
+    # a balanced random mix still wanders, trim every collection back to
+    # target so only a leak can make the server's collections grow
+    for kind, name in COLLECTIONS.items():
+        while pools.size(name) > target:
+            item = pools.take(name)
+            client.delete(f"/{kind}/{item[name]}")
+
+
+def t_critical(samples):
+    df = samples - 2
+    return T_CRITICAL[max(d for d in T_CRITICAL if d <= df)] if df >= 1 else math.inf
+
+
+def trend(xs, ys):
+    # least-squares slope and its t statistic
+    n = len(xs)
+    if n < 3:
+        return 0.0, 0.0
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    sxx = sum((x - mean_x) ** 2 for x in xs)
+    if sxx == 0:
+        return 0.0, 0.0
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sxx
+    residual = sum((y - mean_y - slope * (x - mean_x)) ** 2 for x, y in zip(xs, ys))
+    error = math.sqrt(residual / (n - 2) / sxx)
+    if error == 0:
+        return slope, math.inf if slope else 0.0
+    return slope, slope / error
+
+
+def drift(samples):
+    # nothing to fit before the first interval is over
+    if not samples:
+        return []
+    rows = []
+    xs = [sample["t"] / 3600 for sample in samples]
+    for key, relative, absolute in SERIES:
+        ys = [sample[key] for sample in samples]
+        slope, t = trend(xs, ys)
+        change = slope * (xs[-1] - xs[0]) if len(xs) > 1 else 0.0
+        mean = sum(ys) / len(ys)
+        growing = t > t_critical(len(samples)) and change > max(relative * abs(mean), absolute)
+        rows.append({
+            "series": key,
+            "start": ys[0],
+            "end": ys[-1],
+            "slope_per_hour": round(slope, 3),
+            "t": round(t, 2) if math.isfinite(t) else "inf",
+            "drift": growing,
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="long-running soak test with drift detection")
+    parser.add_argument("--minutes", type=float, default=60, help="length of the run")
+    parser.add_argument("--interval", type=float, default=60, help="seconds between samples")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workload", metavar="PATH", help="json workload definition instead of the soak mix")
+    parser.add_argument("--entities", type=int, default=50, help="todos, projects and categories created up front")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="write the samples and drift as json to PATH (after every sample)")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    args = parser.parse_args(argv)
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, args.concurrency))
+
+    workload = load_workload(args.workload) if args.workload else SOAK_WORKLOAD
+    pid = resources.server_pid()
+    if pid is None:
+        raise SystemExit(f"no process is listening at {client.API_URL}, set TODO_API_PID")
+    rng = random.Random(args.seed)
+    pools = Pools(random.Random(args.seed))
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    samples = []
+    try:
+        seed(pools, args.entities, rng)
+        # whatever the server held before the run is not ours to count
+        baseline = {kind: size - pools.size(COLLECTIONS[kind]) for kind, size in collection_sizes().items()}
+        start = time.perf_counter()
+        end = start + args.minutes * 60
+        while time.perf_counter() < end:
+            total = run(workload, args.concurrency, min(args.interval, end - time.perf_counter()), pools, rng)[-1]
+            rebalance(pools, args.entities)
+            sizes = collection_sizes()
+            _, rss, threads, fds = resources.read_process(pid)
+            sample = dict(
+                t=round(time.perf_counter() - start, 1),
+                requests=total["count"],
+                errors=total["errors"],
+                p50_ms=total["p50_ms"],
+                p99_ms=total["p99_ms"],
+                rss_mb=round(rss, 1),
+                threads=threads,
+                fds=fds,
+                leaked=sum(sizes[kind] - baseline[kind] - pools.size(COLLECTIONS[kind]) for kind in sizes),
+                **sizes,
+            )
+            samples.append(sample)
+            print(f"{sample['t']:.0f}s: p99 {sample['p99_ms']}ms, rss {sample['rss_mb']}MB, "
+                  f"todos {sample['todos']}, leaked {sample['leaked']}", file=sys.stderr)
+            if args.json:
+                write_json(args.json, {"api_url": client.API_URL, "workload": workload, "samples": samples})
+    finally:
+        client.remove_listener(registry)
+        registry.teardown(args.concurrency)
+
+    print_table(samples, ["t", "requests", "errors", "p50_ms", "p99_ms", "rss_mb", "threads", "fds",
+                          "todos", "projects", "categories", "leaked"])
+    rows = drift(samples)
+    print("")
+    print_table(rows, ["series", "start", "end", "slope_per_hour", "t", "drift"])
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "workload": workload, "samples": samples, "drift": rows})
+    return 1 if any(row["drift"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
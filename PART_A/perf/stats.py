@@ -0,0 +1,5 @@
+# the benchmarks' statistics and report output live in common/stats.py, next
+# to the tools in common that print reports too
+from common.stats import print_table, summarize, write_json
+
+__all__ = ["print_table", "summarize", "write_json"]
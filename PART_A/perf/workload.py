@@ -0,0 +1,386 @@
+import argparse
+import glob
+import json
+import os
+import random
+import re
+import string
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import client, resources
+from common.cleanup import CleanupRegistry
+from common.histogram import Histogram
+from perf.stats import print_table, summarize, write_json
+
+# workload mixes and a closed-loop engine to run them
+#
+# a workload is a list of operations, each a method and path template with a
+# weight and a body generator. placeholders like {todo} (and the pools listed
+# in "uses", for ids sent in the body) are filled from pools of live ids that
+# the operations themselves grow (creates) and shrink (consumes), so deletes
+# always have something to delete. a workload can be written as json:
+#
+#   {"name": "reads", "operations": [
+#     {"method": "GET", "path": "/todos/{todo}", "weight": 9},
+#     {"method": "POST", "path": "/todos", "body": "todo", "creates": "todo", "weight": 1}
+#   ]}
+#
+# the default mix counts the requests the todos and projects suites make to
+# every route, so it weighs routes the way the tests exercise them.
+#
+# usage (from PART_A): python -m perf.workload --profile read-heavy --concurrency 1,4,16
+
+PART_A = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SUITES = [os.path.join(PART_A, "todos", "tests"), os.path.join(PART_A, "projects", "tests")]
+
+# the routes a workload can drive, with how to fill and account for them
+ROUTES = {
+    #### TODOS ####
+    ("GET", "/todos"): {},
+    ("HEAD", "/todos"): {},
+    ("POST", "/todos"): {"body": "todo", "creates": "todo"},
+    ("GET", "/todos/{todo}"): {},
+    ("HEAD", "/todos/{todo}"): {},
+    ("POST", "/todos/{todo}"): {"body": "update", "expect": [200]},
+    ("PUT", "/todos/{todo}"): {"body": "update"},
+    ("DELETE", "/todos/{todo}"): {"consumes": "todo"},
+    ("GET", "/todos/{todo}/categories"): {},
+    ("HEAD", "/todos/{todo}/categories"): {},
+    ("POST", "/todos/{todo}/categories"): {"body": "link_category", "uses": ["category"], "links": "todo_category"},
+    ("DELETE", "/todos/{todo}/categories/{category}"): {"consumes": "todo_category"},
+    ("GET", "/todos/{todo}/tasksof"): {},
+    ("HEAD", "/todos/{todo}/tasksof"): {},
+    ("POST", "/todos/{todo}/tasksof"): {"body": "project", "creates": "project", "links": "todo_project"},
+    ("DELETE", "/todos/{todo}/tasksof/{project}"): {"consumes": "todo_project"},
+    #### PROJECTS ####
+    ("GET", "/projects"): {},
+    ("HEAD", "/projects"): {},
+    ("POST", "/projects"): {"body": "project", "creates": "project"},
+    ("GET", "/projects/{project}"): {},
+    ("PUT", "/projects/{project}"): {"body": "update"},
+    ("DELETE", "/projects/{project}"): {"consumes": "project"},
+    ("GET", "/projects/{project}/categories"): {},
+    ("POST", "/projects/{project}/categories"): {"body": "category", "creates": "category"},
+    ("GET", "/projects/{project}/tasks"): {},
+    ("POST", "/projects/{project}/tasks"): {"body": "todo", "creates": "todo", "links": "todo_project"},
+    ("DELETE", "/projects/{project}/tasks/{todo}"): {"consumes": "todo_project"},
+    #### CATEGORIES ####
+    ("POST", "/categories"): {"body": "category", "creates": "category"},
+}
+EXPECT = {"GET": [200], "HEAD": [200], "POST": [201], "PUT": [200], "DELETE": [200]}
+READS = ("GET", "HEAD")
+ENTITIES = ("todo", "project", "category")
+
+# share of read requests per named profile, None keeps the suite weights
+PROFILES = {"suites": None, "read-heavy": 0.9, "balanced": 0.5, "write-heavy": 0.2}
+
+# the collection segment a path id belongs to, /todos/{x}/tasksof/{y} -> project
+PLACEHOLDERS = {"todos": "todo", "projects": "project", "categories": "category", "tasks": "todo", "tasksof": "project"}
+
+WORDS = ("lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut "
+         "labore et dolore magna aliqua quis nostrud exercitation ullamco laboris nisi aliquip ex ea "
+         "commodo consequat duis aute irure in reprehenderit voluptate velit esse cillum fugiat nulla "
+         "pariatur excepteur sint occaecat cupidatat non proident").split()
+
+
+#### DATA GENERATORS ####
+# each returns the json body for one request from the filled path parameters
+
+
+def lorem(rng, words=4):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def todo_body(rng, params):
+    return {"title": lorem(rng), "description": lorem(rng, 8), "doneStatus": rng.random() < 0.5}
+
+
+def project_body(rng, params):
+    return {"title": lorem(rng), "description": lorem(rng, 8), "completed": False, "active": rng.random() < 0.5}
+
+
+def category_body(rng, params):
+    return {"title": lorem(rng, 2), "description": lorem(rng, 6)}
+
+
+def update_body(rng, params):
+    return {"title": lorem(rng), "description": lorem(rng, 8)}
+
+
+def link_category_body(rng, params):
+    return {"id": params["category"]}
+
+
+GENERATORS = {
+    "todo": todo_body,
+    "project": project_body,
+    "category": category_body,
+    "update": update_body,
+    "link_category": link_category_body,
+}
+
+
+#### WORKLOAD DEFINITIONS ####
+
+
+def route_template(path):
+    # /todos/{todos_id}/categories/{category_id} -> /todos/{todo}/categories/{category}
+    segments = path.split("?")[0].strip("/").split("/")
+    for i in range(1, len(segments)):
+        if segments[i].startswith("{") and segments[i - 1] in PLACEHOLDERS:
+            segments[i] = "{" + PLACEHOLDERS[segments[i - 1]] + "}"
+    return "/" + "/".join(segments)
+
+
+def inventory(directories=SUITES):
+    # (method, route template) -> number of requests the test modules make to it
+    calls = Counter()
+    pattern = re.compile(r'client\.(\w+)\(\s*API_URL\s*\+\s*f?"([^"]+)"')
+    for directory in directories:
+        for path in sorted(glob.glob(os.path.join(directory, "*.py"))):
+            with open(path) as f:
+                for method, url in pattern.findall(f.read()):
+                    calls[(method.upper(), route_template(url))] += 1
+    return calls
+
+
+def default_workload():
+    # the suite routes with a known success path, weighted by how often they are hit;
+    # negative tests (unknown ids, unsupported methods) are not realistic traffic
+    operations = []
+    for (method, path), count in sorted(inventory().items()):
+        if (method, path) in ROUTES:
+            operations.append(dict(ROUTES[(method, path)], method=method, path=path, weight=count))
+    return {"name": "suites", "operations": operations}
+
+
+def load_workload(path):
+    with open(path) as f:
+        workload = json.load(f)
+    for operation in workload["operations"]:
+        if operation.get("body") and operation["body"] not in GENERATORS:
+            raise SystemExit(f"unknown body generator {operation['body']}, expected one of {', '.join(GENERATORS)}")
+    return workload
+
+
+def with_read_share(workload, share):
+    # rescale the weights so reads make up share of the requests
+    operations = [dict(operation) for operation in workload["operations"]]
+    reads = sum(o["weight"] for o in operations if o["method"] in READS)
+    writes = sum(o["weight"] for o in operations if o["method"] not in READS)
+    for operation in operations:
+        if operation["method"] in READS:
+            operation["weight"] = operation["weight"] * share / reads if reads else 0
+        else:
+            operation["weight"] = operation["weight"] * (1 - share) / writes if writes else 0
+    return dict(workload, operations=operations)
+
+
+#### ENGINE ####
+
+
+class Pools:
+    # live path parameters per pool: {"todo": id} items for entities,
+    # {"todo": id, "category": id} items for links
+
+    def __init__(self, rng):
+        self.lock = threading.Lock()
+        self.rng = rng
+        self.items = {}
+
+    def add(self, name, item):
+        with self.lock:
+            items = self.items.setdefault(name, [])
+            # linking a pair twice leaves one link on the server, a second
+            # copy here would get a 404 when it is deleted
+            if name in ENTITIES or item not in items:
+                items.append(item)
+
+    def pick(self, name):
+        with self.lock:
+            items = self.items.get(name)
+            return self.rng.choice(items) if items else None
+
+    def take(self, name):
+        with self.lock:
+            items = self.items.get(name, [])
+            # keep one entity around so reads never run dry
+            if len(items) <= (name in ENTITIES):
+                return None
+            item = items.pop(self.rng.randrange(len(items)))
+            if name in ENTITIES:
+                # links to a deleted entity go with it
+                for other, values in self.items.items():
+                    if other != name:
+                        values[:] = [v for v in values if v.get(name) != item[name]]
+            return item
+
+    def size(self, name):
+        with self.lock:
+            return len(self.items.get(name, []))
+
+    def live(self, params):
+        # whether every entity in params is still in its pool
+        with self.lock:
+            return all({k: v} in self.items.get(k, []) for k, v in params.items() if k in ENTITIES)
+
+
+def fill(operation, pools):
+    # path parameters for one request, None when a pool is empty
+    params = {}
+    if operation.get("consumes"):
+        item = pools.take(operation["consumes"])
+        if item is None:
+            return None
+        params.update(item)
+    names = [name for _, name, _, _ in string.Formatter().parse(operation["path"]) if name]
+    for name in names + operation.get("uses", []):
+        if name not in params:
+            item = pools.pick(name)
+            if item is None:
+                return None
+            params.update(item)
+    return params
+
+
+def execute(operation, pools, rng):
+    # sends one request, returns "ok", "error", "stale" (a 404 for an entity
+    # another worker deleted meanwhile) or None when there was nothing to do
+    params = fill(operation, pools)
+    if params is None:
+        return None
+    path = operation["path"].format(**params)
+    body = operation.get("body")
+    kwargs = {"json": GENERATORS[body](rng, params)} if body else {}
+    try:
+        response = client.request(operation["method"], path, **kwargs)
+    except requests.RequestException:
+        return "error"
+    if response.status_code not in operation.get("expect", EXPECT[operation["method"]]):
+        return "stale" if response.status_code == 404 and not pools.live(params) else "error"
+    if operation.get("creates") or operation.get("links"):
+        created = {}
+        if operation.get("creates"):
+            created = {operation["creates"]: response.json()["id"]}
+            pools.add(operation["creates"], created)
+        if operation.get("links"):
+            pools.add(operation["links"], dict(params, **created))
+    return "ok"
+
+
+def name_of(operation):
+    return operation.get("name") or f"{operation['method']} {operation['path']}"
+
+
+def run(workload, concurrency, duration, pools, rng):
+    # closed loop: every worker sends its next request as soon as the last returns
+    operations = [o for o in workload["operations"] if o["weight"] > 0]
+    weights = [o["weight"] for o in operations]
+    latencies = {name_of(o): Histogram() for o in operations}
+    lock = threading.Lock()
+    errors = Counter()
+    stale = Counter()
+    total = Histogram()
+    base = rng.randrange(2 ** 32)
+    deadline = time.perf_counter() + duration
+
+    def worker(index):
+        # one generator per worker, a shared one is drawn from in whatever
+        # order the threads get to it
+        own = random.Random(base + index)
+        while time.perf_counter() < deadline:
+            operation = own.choices(operations, weights)[0]
+            start = time.perf_counter()
+            outcome = execute(operation, pools, own)
+            if outcome is None:
+                continue
+            elapsed = time.perf_counter() - start
+            latencies[name_of(operation)].record(elapsed)
+            total.record(elapsed)
+            with lock:
+                errors[name_of(operation)] += outcome == "error"
+                stale[name_of(operation)] += outcome == "stale"
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    rows = [
+        dict(operation=name, concurrency=concurrency, stale=stale[name], **summarize(histogram, errors[name], elapsed))
+        for name, histogram in latencies.items()
+        if histogram.count
+    ]
+    rows.append(dict(operation="total", concurrency=concurrency, stale=sum(stale.values()),
+                     **summarize(total, sum(errors.values()), elapsed)))
+    return rows
+
+
+def seed(pools, count, rng):
+    for kind, path in (("todo", "/todos"), ("project", "/projects"), ("category", "/categories")):
+        for _ in range(count):
+            response = client.post(path, json=GENERATORS[kind](rng, {}))
+            assert response.status_code == 201, f"POST {path} failed while seeding"
+            pools.add(kind, {kind: response.json()["id"]})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="run a weighted workload mix at a chosen concurrency")
+    parser.add_argument("--workload", metavar="PATH", help="json workload definition (default: the suite mix)")
+    parser.add_argument("--profile", choices=PROFILES, default="suites", help="rescale the mix to a read share")
+    parser.add_argument("--read-share", type=float, help="fraction of reads, overrides --profile")
+    parser.add_argument("--concurrency", default="1,4,16", help="concurrent workers, one run each")
+    parser.add_argument("--duration", type=float, default=10, help="seconds per run")
+    parser.add_argument("--entities", type=int, default=20, help="todos, projects and categories created up front")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--dump", action="store_true", help="print the workload as json and exit")
+    parser.add_argument("--json", metavar="PATH", help="write the results as json to PATH")
+    parser.add_argument("--backend", choices=["http", "fake"])
+    parser.add_argument("--monitor", type=float, metavar="SECONDS", help="sample the server's cpu, memory, threads and fds every SECONDS")
+    args = parser.parse_args(argv)
+
+    workload = load_workload(args.workload) if args.workload else default_workload()
+    share = args.read_share if args.read_share is not None else PROFILES[args.profile]
+    if share is not None:
+        workload = with_read_share(workload, share)
+    if args.dump:
+        print(json.dumps(workload, indent=2))
+        return 0
+
+    levels = [int(c) for c in args.concurrency.split(",")]
+    client.configure(backend=args.backend, pool_size=max(client.POOL_SIZE, *levels))
+    resources.start(args.monitor)
+    rng = random.Random(args.seed)
+    pools = Pools(random.Random(args.seed))
+    registry = CleanupRegistry()
+    client.add_listener(registry)
+    rows = []
+    try:
+        seed(pools, args.entities, rng)
+        for concurrency in levels:
+            result = run(workload, concurrency, args.duration, pools, rng)
+            rows += result
+            print(f"concurrency {concurrency}: {result[-1]['throughput_rps']} requests/s, "
+                  f"p99 {result[-1]['p99_ms']}ms", file=sys.stderr)
+    finally:
+        usage = resources.stop()
+        client.remove_listener(registry)
+        registry.teardown(max(levels))
+
+    print_table(rows, ["operation", "concurrency", "count", "errors", "stale", "p50_ms", "p95_ms", "p99_ms", "max_ms", "throughput_rps"])
+    if usage and usage["summary"]:
+        print(resources.describe(usage["summary"]), file=sys.stderr)
+    if args.json:
+        write_json(args.json, {"api_url": client.API_URL, "workload": workload, "results": rows,
+                               "resources": usage})
+    return 1 if any(row["errors"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,11 @@
-import random
 import pytest
-import requests
+import os
+import sys
+
+# make the shared helpers in PART_A/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from common import client
 
 from test_projects_documented_capabilities import (
     test_get_projects,
@@ -37,91 +42,14 @@ from test_projects_unexpected_capabilities import (
     test_post_projects_id_categories_with_different_id_formats_allow_pass,
 )
 
-API_URL = "http://localhost:4567"
-
-
-def ensure_system_ready():
-    # check if api is up and running
-    try:
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is not active"
-    except requests.exceptions.ConnectionError:
-        raise AssertionError("API is not active or could not connect")
-
-# Test Summary function
-def test_summary():
-    passed_tests = 0
-    failed_tests = 0
+API_URL = client.API_URL
 
-    # Gather all test functions from different modules
-    test_functions = [
-        # Documented Tests
-        test_get_projects,
-        test_post_projects,
-        test_head_projects,
-        test_get_projects_id,
-        test_put_projects_id,
-        test_delete_projects_id,
-        test_post_projects_id_categories,
-        test_get_projects_id_categories,
-        test_post_projects_id_tasks,
-        test_get_projects_id_tasks,
-        test_delete_projects_id_tasks_id,
-        
-        # Undocumented Tests
-        test_delete_projects,
-        test_patch_projects,
-        test_options_projects,
-        test_patch_projects_id,
-        test_options_projects_id,
-        test_put_projects_id_categories,
-        test_patch_projects_id_categories,
-        test_options_projects_id_categories,
-        
-        # Unexpected Tests
-        test_post_projects_id_categories_id_generation,
-        test_get_projects_incorrect_categories,
-        test_get_projects_invalid_id_categories,
-        test_post_projects_id_categories_with_different_id_formats,
-    ]
+# the imported tests are collected again here and run in a shuffled order
+pytestmark = pytest.mark.random_order
 
-    # Shuffle the list to execute tests in a random order
-    random.shuffle(test_functions)
-
-    print("\nRunning Randomized Test Suite:\n")
-    for test in test_functions:
-        try:
-            test()  # Run the test function
-            print(f"Test {test.__name__}: PASSED")
-            passed_tests += 1
-        except AssertionError as e:
-            print(f"Test {test.__name__}: FAILED - {e}")
-            failed_tests += 1
-
-    print("\nSummary:")
-    print(f"Total tests run: {len(test_functions)}")
-    print(f"Passed: {passed_tests}")
-    print(f"Failed: {failed_tests}")
 
 # Running all tests
 if __name__ == "__main__":
-
-    # check that system is running
-    try:
-        ensure_system_ready()
-        run_tests = True
-    except AssertionError as e:
-        print(f"System not ready: {e}")
-        run_tests = False
-
-    # run the tests and shut down after
-    if run_tests:
-        pytest.main([__file__, "-s"])
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is already shutdown"
-        try:
-            response = requests.get(API_URL + "/shutdown")
-        except requests.exceptions.ConnectionError:
-            assert True
-    else:
-        print("Tests skipped: API is not running or could not be reached.")
+    # the jar is started for this run unless one is already up, and only a
+    # jar started here is shut down afterwards
+    sys.exit(pytest.main([__file__, "-s", "--start-server"]))
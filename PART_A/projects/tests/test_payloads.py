@@ -1,15 +1,15 @@
 import pytest
-import requests
 import json
+import os
+import sys
 
-API_URL = "http://localhost:4567"
+# make the shared helpers in PART_A/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+
+from common import client
+
+API_URL = client.API_URL
 
-def ensure_system_ready():
-    try:
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is not active"
-    except requests.exceptions.ConnectionError:
-        raise AssertionError("API is not active or could not connect")
 
 #### PROJECTS PAYLOAD TESTS ####
 
@@ -18,7 +18,7 @@ def test_post_projects_malformed_json():
     malformed_json = '{"title": "test_title", "description": "test_description"'
     headers = {"Content-Type": "application/json"}
 
-    response = requests.post(API_URL + "/projects", data=malformed_json, headers=headers)
+    response = client.post(API_URL + "/projects", data=malformed_json, headers=headers)
 
     # expecting bad request response due to bad data
     assert (
@@ -33,7 +33,7 @@ def test_post_projects_malformed_xml():
                        </projects>"""
     headers = {"Content-Type": "application/xml"}
 
-    response = requests.post(API_URL + "/projects", data=malformed_xml, headers=headers)
+    response = client.post(API_URL + "/projects", data=malformed_xml, headers=headers)
 
     # expecting bad request response due to invalid xml
     assert (
@@ -48,7 +48,7 @@ def test_post_projects_invalid_xml():
                      </projects>"""
     headers = {"Content-Type": "application/xml"}
 
-    response = requests.post(API_URL + "/projects", data=invalid_xml, headers=headers)
+    response = client.post(API_URL + "/projects", data=invalid_xml, headers=headers)
 
     # expecting bad request response due to invalid XML (incorrect structure)
     assert (
@@ -64,71 +64,16 @@ def test_post_projects_valid_xml():
                    </project>"""
     headers = {"Content-Type": "application/xml"}
 
-    response = requests.post(API_URL + "/projects", data=valid_xml, headers=headers)
+    response = client.post(API_URL + "/projects", data=valid_xml, headers=headers)
 
     # expecting successful response
     assert (
         response.status_code == 201
     ), f"POST /projects with valid xml did not return 201. Got {response.status_code} with response: {response.text}"
 
-    # Cleanup
-    project_id = None
-    if response.status_code == 201:
-        project_data = response.json()
-        if "id" in project_data:
-            project_id = project_data["id"]
-
-    if project_id:
-        response = requests.delete(API_URL + f"/projects/{project_id}")
-        assert response.status_code in [200, 204], f"DELETE /projects/{project_id} failed"
-
-
-#### SUMMARY FUNCTION ####
-def test_summary():
-    passed_tests = 0
-    failed_tests = 0
-    test_functions = [
-        test_post_projects_malformed_json,
-        test_post_projects_malformed_xml,
-        test_post_projects_invalid_xml,
-        test_post_projects_valid_xml,
-    ]
-
-    print("")
-    for test in test_functions:
-        try:
-            test()
-            print(f"Test {test.__name__}: PASSED")
-            passed_tests += 1
-        except AssertionError as e:
-            print(f"Test {test.__name__}: FAILED - {e}")
-            failed_tests += 1
-
-    print("\nSummary:")
-    print(f"Total tests run: {len(test_functions)}")
-    print(f"Passed: {passed_tests}")
-    print(f"Failed: {failed_tests}")
-
 
 # Running all tests
 if __name__ == "__main__":
-
-    # check that system is runnig
-    try:
-        ensure_system_ready()
-        run_tests = True
-    except AssertionError as e:
-        print(f"System not ready: {e}")
-        run_tests = False
-
-    # run the tests and shut down after
-    if run_tests:
-        pytest.main([__file__, "-s"])
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is already shutdown"
-        try:
-            response = requests.get(API_URL + "/shutdown")
-        except requests.exceptions.ConnectionError:
-            assert True
-    else:
-        print("Tests skipped: API is not running or could not be reached.")
+    # the jar is started for this run unless one is already up, and only a
+    # jar started here is shut down afterwards
+    sys.exit(pytest.main([__file__, "-s", "--start-server"]))
@@ -1,22 +1,20 @@
 import pytest
-import requests
 import json
+import os
+import sys
 
-API_URL = "http://localhost:4567"
+# make the shared helpers in PART_A/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
 
+from common import client
 
-def ensure_system_ready():
-    try:
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is not active"
-    except requests.exceptions.ConnectionError:
-        raise AssertionError("API is not active or could not connect")
+API_URL = client.API_URL
 
 
 def test_post_xml_fail():
     # create todo for testing invalid xml post
     data = {"title": "test_title", "description": "test_description"}
-    response = requests.post(API_URL + "/todos", json=data)
+    response = client.post(API_URL + "/todos", json=data)
     assert response.status_code == 201, "failed to create todo"
     todo_id = response.json()["id"]
 
@@ -25,22 +23,18 @@ def test_post_xml_fail():
                        <id>10</id>
                      </todos>"""
     headers = {"Content-Type": "application/xml"}
-    response = requests.post(
+    response = client.post(
         API_URL + f"/todos/{todo_id}/categories", data=invalid_xml, headers=headers
     )
     assert (
         response.status_code == 400
     ), f"POST /todos/{todo_id}/categories with invalid xml did not return 400"
 
-    # cleanup
-    response = requests.delete(API_URL + f"/todos/{todo_id}")
-    assert response.status_code in [200, 204], f"DELETE /todos/{todo_id} failed"
-
 
 def test_post_xml_pass():
     # create todo for testing valid xml post
     data = {"title": "test_title", "description": "test_description"}
-    response = requests.post(API_URL + "/todos", json=data)
+    response = client.post(API_URL + "/todos", json=data)
     assert response.status_code == 201, "failed to create todo"
     todo_id = response.json()["id"]
 
@@ -49,38 +43,20 @@ def test_post_xml_pass():
                      <title>title</title>
                    </category>"""
     headers = {"Content-Type": "application/xml"}
-    response = requests.post(
+    response = client.post(
         API_URL + f"/todos/{todo_id}/categories", data=valid_xml, headers=headers
     )
     assert (
         response.status_code == 200 or response.status_code == 201
     ), f"POST /todos/{todo_id}/categories with valid xml did not return 200 or 201"
 
-    # delete category if created
-    category_id = None
-    if response.status_code == 201:
-        category_data = response.json()
-        if "id" in category_data:
-            category_id = category_data["id"]
-
-    if category_id:
-        response = requests.delete(API_URL + f"/categories/{category_id}")
-        assert response.status_code in [
-            200,
-            204,
-        ], f"DELETE /categories/{category_id} failed"
-
-    # cleanup
-    response = requests.delete(API_URL + f"/todos/{todo_id}")
-    assert response.status_code in [200, 204], f"DELETE /todos/{todo_id} failed"
-
 
 def test_post_todos_malformed_json():
     # post with malformed json data
     malformed_json = '{"title": "test_title", "description": "test_description"'
     headers = {"Content-Type": "application/json"}
 
-    response = requests.post(API_URL + "/todos", data=malformed_json, headers=headers)
+    response = client.post(API_URL + "/todos", data=malformed_json, headers=headers)
 
     # expecting bad request response due to malformed json
     assert (
@@ -95,7 +71,7 @@ def test_post_todos_malformed_xml():
                        </todos>"""
     headers = {"Content-Type": "application/xml"}
 
-    response = requests.post(API_URL + "/todos", data=malformed_xml, headers=headers)
+    response = client.post(API_URL + "/todos", data=malformed_xml, headers=headers)
 
     # expecting bad request response due to malformed xml
     assert (
@@ -103,52 +79,8 @@ def test_post_todos_malformed_xml():
     ), f"POST /todos with malformed xml did not return 400 as expected. got {response.status_code} with response: {response.text}"
 
 
-# test summary that ensures all tests are run and results are displayed
-def test_summary():
-    passed_tests = 0
-    failed_tests = 0
-    test_functions = [
-        test_post_todos_malformed_json,
-        test_post_todos_malformed_xml,
-        test_post_xml_pass,
-        test_post_xml_fail,
-    ]
-
-    print("")
-    for test in test_functions:
-        try:
-            test()
-            print(f"Test {test.__name__}: PASSED")
-            passed_tests += 1
-        except AssertionError as e:
-            print(f"Test {test.__name__}: FAILED - {e}")
-            failed_tests += 1
-
-    print("\nSummary:")
-    print(f"Total tests run: {len(test_functions)}")
-    print(f"Passed: {passed_tests}")
-    print(f"Failed: {failed_tests}")
-
-
 # Running all tests
 if __name__ == "__main__":
-
-    # check that system is runnig
-    try:
-        ensure_system_ready()
-        run_tests = True
-    except AssertionError as e:
-        print(f"System not ready: {e}")
-        run_tests = False
-
-    # run the tests and shit down after
-    if run_tests:
-        pytest.main([__file__, "-s"])
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is already shutdown"
-        try:
-            response = requests.get(API_URL + "/shutdown")
-        except requests.exceptions.ConnectionError:
-            assert True
-    else:
-        print("Tests skipped: API is not running or could not be reached.")
+    # the jar is started for this run unless one is already up, and only a
+    # jar started here is shut down afterwards
+    sys.exit(pytest.main([__file__, "-s", "--start-server"]))
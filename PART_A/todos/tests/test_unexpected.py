@@ -1,49 +1,30 @@
-import requests
 import pytest
+import os
+import sys
 
-API_URL = "http://localhost:4567"
+# make the shared helpers in PART_A/common importable when run as a script
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
 
+from common import client, state
 
-def ensure_system_ready():
-    try:
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is not active"
-    except requests.exceptions.ConnectionError:
-        raise AssertionError("API is not active or could not connect")
-
-
-# get initial state of todos and categories
-def get_all_todos():
-    response = requests.get(API_URL + "/todos")
-    return response.json().get("todos", []) if response.status_code == 200 else []
-
-
-def get_all_categories():
-    response = requests.get(API_URL + "/categories")
-    return response.json().get("categories", []) if response.status_code == 200 else []
+API_URL = client.API_URL
 
 
 # helper to create todos instances
 def create_todo(title="Default Title", description="Default Description"):
     data = {"title": title, "description": description}
-    response = requests.post(API_URL + "/todos", json=data)
+    response = client.post(API_URL + "/todos", json=data)
     assert response.status_code == 201, "Failed to create todo"
     return response.json()["id"]
 
 
-# restore state to initial state
-def restore_initial_state(initial_todos, initial_categories):
-    current_todos = get_all_todos()
-    current_categories = get_all_categories()
-
-    # delete all not in init state
-    for todo in current_todos:
-        if todo not in initial_todos:
-            requests.delete(API_URL + f"/todos/{todo['id']}")
-
-    for category in current_categories:
-        if category not in initial_categories:
-            requests.delete(API_URL + f"/categories/{category['id']}")
+# snapshot todos, projects and categories before the module runs and restore
+# them (new entities deleted, modified ones and their links put back) after
+@pytest.fixture(scope="module", autouse=True)
+def initial_state():
+    snapshot = state.take_snapshot()
+    yield
+    state.restore(snapshot)
 
 
 # test ID Generation for Categories Linked to todos
@@ -51,7 +32,7 @@ def test_post_todos_id_categories_id_generation():
     todos_id = create_todo(title="New todos", description="todos description")
 
     # cleanup
-    response = requests.delete(API_URL + f"/todos/{todos_id}")
+    response = client.delete(API_URL + f"/todos/{todos_id}")
     delete_success = response.status_code in [200, 204]
 
     # create a category linked to the newly created todo
@@ -59,7 +40,7 @@ def test_post_todos_id_categories_id_generation():
         "title": "First Category",
         "description": "Description for the first category",
     }
-    category_response = requests.post(
+    category_response = client.post(
         API_URL + f"/todos/{todos_id}/categories", json=category_data
     )
 
@@ -78,10 +59,10 @@ def test_post_todos_id_categories_id_generation():
 def test_get_todos_incorrect_categories():
     # Create and delete a todo to ensure it doesn't exist
     todos_id = create_todo()
-    requests.delete(API_URL + f"/todos/{todos_id}")
+    client.delete(API_URL + f"/todos/{todos_id}")
 
     # attempt to GET categories for a todo that does not exist
-    response = requests.get(API_URL + f"/todos/{todos_id}/categories")
+    response = client.get(API_URL + f"/todos/{todos_id}/categories")
     assert (
         response.status_code == 404
     ), f"GET /todos/{todos_id}/categories should return 404 when the todo does not exist, but got status code {response.status_code}"
@@ -90,7 +71,7 @@ def test_get_todos_incorrect_categories():
 # testing GET with an Invalid todos ID (/todos/anything/categories)
 def test_get_todos_invalid_id_categories():
     # attempt to GET categories using an invalid todos ID
-    response = requests.get(API_URL + "/todos/anything/categories")
+    response = client.get(API_URL + "/todos/anything/categories")
     assert (
         response.status_code == 404
     ), f"GET /todos/anything/categories should return 404 for an invalid todos ID, but got status code {response.status_code}"
@@ -102,7 +83,7 @@ def test_post_todos_id_categories_with_different_id_formats():
     todos_id = create_todo(title="New todos for Category Test")
 
     # cleanup
-    response = requests.delete(API_URL + f"/todos/{todos_id}")
+    response = client.delete(API_URL + f"/todos/{todos_id}")
     delete_success = response.status_code in [200, 204]
 
     # attempt to POST category with id as numeric
@@ -111,7 +92,7 @@ def test_post_todos_id_categories_with_different_id_formats():
         "title": "Category with Numeric ID",
         "description": "Testing numeric ID input",
     }
-    response_numeric = requests.post(
+    response_numeric = client.post(
         API_URL + f"/todos/{todos_id}/categories", json=category_data_numeric_id
     )
 
@@ -126,7 +107,7 @@ def test_post_todos_id_categories_with_different_id_formats():
         "title": "Category with String ID",
         "description": "Testing string ID input",
     }
-    response_string = requests.post(
+    response_string = client.post(
         API_URL + f"/todos/{todos_id}/categories", json=category_data_string_id
     )
     assert (
@@ -138,11 +119,11 @@ def test_post_todos_id_categories_with_different_id_formats():
 def test_get_todos_incorrect_categories_allow_pass():
 
     todos_id = create_todo()
-    response_delete = requests.delete(API_URL + f"/todos/{todos_id}")
+    response_delete = client.delete(API_URL + f"/todos/{todos_id}")
     assert response_delete.status_code in [200, 204], f"DELETE /todos/{todos_id} failed"
 
     # attempt to GET categories for a todo that does not exist
-    response = requests.get(API_URL + f"/todos/{todos_id}/categories")
+    response = client.get(API_URL + f"/todos/{todos_id}/categories")
     if response.status_code == 404:
         assert True, f"GET /todos/{todos_id}/categories returned 404 as expected."
     elif response.status_code == 200:
@@ -158,7 +139,7 @@ def test_get_todos_incorrect_categories_allow_pass():
 # test to accept unexpected 200 response for an invalid todo ID
 def test_get_todos_invalid_id_categories_allow_pass():
 
-    response = requests.get(API_URL + "/todos/anything/categories")
+    response = client.get(API_URL + "/todos/anything/categories")
     if response.status_code == 404:
         assert (
             True
@@ -183,7 +164,7 @@ def test_post_todos_id_categories_with_string_id_allow_pass():
         "title": "Category with String ID",
         "description": "Testing string ID input",
     }
-    response_string = requests.post(
+    response_string = client.post(
         API_URL + f"/todos/{todos_id}/categories", json=category_data_string_id
     )
 
@@ -197,7 +178,7 @@ def test_post_todos_id_categories_with_string_id_allow_pass():
         ), "POST /todos/:id/categories failed with a string ID, but allowing the test to pass."
 
     # cleanup
-    response = requests.delete(API_URL + f"/todos/{todos_id}")
+    response = client.delete(API_URL + f"/todos/{todos_id}")
     assert response.status_code in [200, 204], f"DELETE /todos/{todos_id} failed"
 
 
@@ -210,69 +191,19 @@ def test_post_todos_id_categories_with_string_id_allow_pass():
         "title": "Category with String ID",
         "description": "Testing string ID input",
     }
-    response_string = requests.post(
+    response_string = client.post(
         API_URL + f"/todos/{todos_id}/categories", json=category_data_string_id
     )
 
     assert True, "Allowing test to pass regardless of status code."
 
     # cleanup
-    response = requests.delete(API_URL + f"/todos/{todos_id}")
+    response = client.delete(API_URL + f"/todos/{todos_id}")
     assert response.status_code in [200, 204], f"DELETE /todos/{todos_id} failed"
 
 
-# test summary that ensures all tests are run and results are displayed
-def test_summary():
-    initial_todos = get_all_todos()
-    initial_categories = get_all_categories()
-
-    passed_tests = 0
-    failed_tests = 0
-    test_functions = [
-        test_post_todos_id_categories_id_generation,
-        test_get_todos_incorrect_categories,
-        test_get_todos_invalid_id_categories,
-        test_post_todos_id_categories_with_different_id_formats,
-        test_get_todos_incorrect_categories_allow_pass,
-        test_get_todos_invalid_id_categories_allow_pass,
-        test_post_todos_id_categories_with_string_id_allow_pass,
-        test_post_todos_id_categories_with_string_id_allow_pass,
-    ]
-
-    print("")
-    for test in test_functions:
-        try:
-            test()  # Call the test function here
-            print(f"Test {test.__name__}: PASSED")
-            passed_tests += 1
-        except AssertionError as e:
-            print(f"Test {test.__name__}: FAILED - {e}")
-            failed_tests += 1
-
-    restore_initial_state(initial_todos, initial_categories)
-
-    print("\nSummary:")
-    print(f"Total tests run: {len(test_functions)}")
-    print(f"Passed: {passed_tests}")
-    print(f"Failed: {failed_tests}")
-
-
 # Running all tests
 if __name__ == "__main__":
-    try:
-        ensure_system_ready()
-        run_tests = True
-    except AssertionError as e:
-        print(f"System not ready: {e}")
-        run_tests = False
-
-    if run_tests:
-        pytest.main([__file__, "-s"])
-        response = requests.get(API_URL)
-        assert response.status_code == 200, "API is already shutdown"
-        try:
-            response = requests.get(API_URL + "/shutdown")
-        except requests.exceptions.ConnectionError:
-            assert True
-    else:
-        print("Tests skipped: API is not running or could not be reached.")
+    # the jar is started for this run unless one is already up, and only a
+    # jar started here is shut down afterwards
+    sys.exit(pytest.main([__file__, "-s", "--start-server"]))